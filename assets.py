@@ -0,0 +1,85 @@
+import time
+
+import pygame
+from pygame import mixer
+
+import number
+
+# Shared, lazily loaded resources for every screen. Images are converted
+# to the display format once and each scaled/rotated variant is cached, so
+# switching screens or redrawing cars never touches the disk or rescales.
+_images = {}
+_fonts = {}
+_sounds = {}
+_display = None
+
+launchTime = time.perf_counter()
+
+
+def init():
+    if not pygame.get_init():
+        pygame.init()
+    if not mixer.get_init():
+        try:
+            mixer.init()
+        except pygame.error as e:
+            print(f"Sound disabled: {e}")
+
+
+def display():
+    global _display
+    if _display is None:
+        init()
+        _display = pygame.display.set_mode((number.WINDOWWIDTH, number.WINDOWHEIGHT))
+        pygame.display.set_caption('Rush Hour Solver')
+        pygame.display.set_icon(pygame.image.load("Resource/icon.png"))
+    return _display
+
+
+def image(path, size=None, alpha=False, angle=0):
+    key = (path, size, alpha, angle)
+    surface = _images.get(key)
+    if surface is None:
+        if angle:
+            surface = pygame.transform.rotate(image(path, size, alpha), angle)
+        elif size is not None:
+            surface = pygame.transform.scale(image(path, None, alpha), size)
+        else:
+            display()
+            surface = pygame.image.load(path)
+            surface = surface.convert_alpha() if alpha else surface.convert()
+        _images[key] = surface
+    return surface
+
+
+def font(size, name=None, bold=False):
+    key = (size, name, bold)
+    f = _fonts.get(key)
+    if f is None:
+        init()
+        f = pygame.font.SysFont(name, size, bold=bold) if name else pygame.font.Font(None, size)
+        _fonts[key] = f
+    return f
+
+
+def sound(path):
+    s = _sounds.get(path)
+    if s is None:
+        init()
+        s = mixer.Sound(path)
+        _sounds[path] = s
+    return s
+
+
+def playMusic(path, volume, loops=-1):
+    # Streams from disk instead of decoding the whole track up front.
+    init()
+    if not mixer.get_init():
+        return
+    mixer.music.load(path)
+    mixer.music.set_volume(volume)
+    mixer.music.play(loops)
+
+
+def sinceLaunch():
+    return (time.perf_counter() - launchTime) * 1000
@@ -0,0 +1,101 @@
+import os
+from dataclasses import dataclass
+
+from gameModels import Algorithm
+from budget import Budget, OutOfBudget
+from parallelBfs import MIN_PARALLEL_LAYER
+from vectorBfs import canVectorize, layeredBfs
+
+# The probe is a breadth-first search cut off after this many nodes; it
+# solves the small levels outright and measures layer widths on the rest.
+PROBE_NODES = 20000
+
+# Layered BFS keeps about this many bytes per reachable state; above
+# FRONTIER_BYTES the frontier search, which keeps two layers, is used.
+LAYER_BYTES_PER_STATE = 16
+FRONTIER_BYTES = 1 << 30
+
+CRITERIA = ("moves", "cost", "any")
+
+
+@dataclass(frozen=True)
+class LevelFeatures:
+    vehicleCount: int
+    activeVehicles: int
+    redBlockers: int       # vehicles between the target car and the exit
+    estimatedStates: int   # exact when known, else the product of lane positions
+    exactStates: bool
+    vectorized: bool
+    probeNodes: int
+    probeMoves: int        # shortest solution if the probe found one, else -1
+    widestLayer: int
+    probePath: tuple = None  # that solution as (vid, delta) moves, for solve() to reuse
+
+
+def redBlockers(board, state):
+    red = board.vehicles[0]
+    front = state[1] + red.length
+    count = 0
+    for vid, v in enumerate(board.vehicles):
+        if vid and not v.isHorizontal and v.col >= front:
+            row = state[vid << 1]
+            count += row <= red.row < row + v.length
+    return count
+
+
+def _probe(board, start_state):
+    perimeter, board.perimeter = board.perimeter, None
+    board.budget = Budget(nodes=PROBE_NODES).start()
+    board.widestLayer = 0
+    try:
+        path = layeredBfs(board, start_state) if canVectorize(board) else board.bfs(start_state)
+    except OutOfBudget:
+        path = None
+    finally:
+        board.budget = None
+        board.perimeter = perimeter
+    return path
+
+
+def levelFeatures(board, start_state, reachableStates=None):
+    # Cheap enough to run when a level is loaded: the lane spans from
+    # Board.laneSpans and a probe of at most PROBE_NODES nodes. Pass the
+    # reachable state count when it is known (level packs store it).
+    board.freezeIrrelevant(start_state)
+    spans, _ = board.laneSpans(start_state)
+    positions = 1
+    for vid in board.activeVehicles:
+        positions *= len(spans[vid]) - board.vehicles[vid].length + 1
+
+    path = _probe(board, start_state)
+    return LevelFeatures(
+        len(board.vehicles), len(board.activeVehicles), redBlockers(board, start_state),
+        positions if reachableStates is None else reachableStates, reachableStates is not None,
+        canVectorize(board), board.nodesExpanded, -1 if path is None else len(path),
+        getattr(board, "widestLayer", 0), None if path is None else tuple(path),
+    )
+
+
+def chooseAlgorithm(features, criterion="moves", workers=None):
+    # Returns (algorithm, heuristic, reason). criterion is "moves" for the
+    # fewest moves, "cost" for the lowest total vehicle length, or "any"
+    # for any solution. The rules follow measurements on the bundled and
+    # generated levels: the numpy layer BFS beats every Python search on
+    # boards it can pack, and IDS and DFS are never worth picking.
+    if criterion not in CRITERIA:
+        raise ValueError(f"unknown criterion {criterion!r}, expected one of {', '.join(CRITERIA)}")
+    workers = workers or os.cpu_count() or 1
+
+    if criterion == "cost":
+        return Algorithm.UCS, "blocking", "lowest cost needs UCS"
+    if features.probeMoves >= 0:
+        return Algorithm.BFS, "blocking", f"probe solved it in {features.probeNodes} nodes"
+    if not features.vectorized:
+        if criterion == "any":
+            return Algorithm.ANYTIME_A_STAR, "blocking", "no numpy, first anytime solution"
+        return Algorithm.A_STAR, "blockers", "no numpy, A* with admissible h"
+    if features.exactStates and features.estimatedStates * LAYER_BYTES_PER_STATE > FRONTIER_BYTES:
+        return Algorithm.FRONTIER_BFS, "blocking", f"{features.estimatedStates} states, low memory"
+    if workers > 1 and features.widestLayer >= MIN_PARALLEL_LAYER:
+        return Algorithm.PARALLEL_BFS, "blocking", f"layers of {features.widestLayer}+ states"
+    return Algorithm.BFS, "blocking", f"{features.redBlockers} blockers, numpy layers"
@@ -0,0 +1,117 @@
+from array import array
+
+from stateTable import NO_MOVE
+
+
+class BucketQueue:
+    # Dial-style open list for small integer priorities. Each state gets a
+    # node id into a compact pool of parallel int arrays (g, f, bucket slot
+    # and the code of the move into it) and sits in exactly one bucket, so
+    # lowering its priority moves it in place instead of leaving a stale
+    # duplicate behind as heapq does. parentMove makes the pool usable as
+    # the parent table for Board._reconstruct_path.
+    #
+    # With largerGFirst, each f bucket is split by g and ties on f are broken
+    # towards the deepest node, which usually reaches the goal sooner in A*.
+    def __init__(self, largerGFirst=False, index=None):
+        self.largerGFirst = largerGFirst
+        self.index = {} if index is None else index
+        self.g = array('i')
+        self.f = array('i')       # -1 when the node is not queued
+        self.slot = array('i')    # position inside its bucket
+        self.move = array('b')    # code of the move into this node
+        self.buckets = []
+        self.cursor = 0
+        self.size = 0
+        self.lastF = None         # priority of the node pop() returned last
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, state):
+        return state in self.index
+
+    def bestG(self, state):
+        node = self.index.get(state)
+        return None if node is None else self.g[node]
+
+    def improves(self, state, g):
+        node = self.index.get(state)
+        return node is None or g < self.g[node]
+
+    def parentMove(self, state):
+        node = self.index.get(state)
+        return NO_MOVE if node is None else self.move[node]
+
+    def packedCosts(self, pack):
+        # (packed state, best g) for every state ever pushed. A StateTable
+        # index is already keyed by packed state.
+        g = self.g
+        if isinstance(self.index, dict):
+            return ((pack(state), g[node]) for state, node in self.index.items())
+        return ((code, g[node]) for code, node in self.index.items())
+
+    def _bucket(self, f, g):
+        while len(self.buckets) <= f:
+            self.buckets.append([])
+        bucket = self.buckets[f]
+        if not self.largerGFirst:
+            return bucket
+        while len(bucket) <= g:
+            bucket.append([])
+        return bucket[g]
+
+    def _remove(self, state, node):
+        bucket = self._bucket(self.f[node], self.g[node])
+        last = bucket.pop()
+        if last != state:
+            k = self.slot[node]
+            bucket[k] = last
+            self.slot[self.index[last]] = k
+        self.size -= 1
+
+    def push(self, state, f, g, move=NO_MOVE):
+        # Returns False when the state is already known with a g at least as
+        # good; otherwise the state is (re)queued as reached by move.
+        node = self.index.get(state)
+        if node is None:
+            node = len(self.g)
+            self.index[state] = node
+            self.g.append(g)
+            self.f.append(-1)
+            self.slot.append(0)
+            self.move.append(move)
+        elif g >= self.g[node]:
+            return False
+        else:
+            if self.f[node] >= 0:
+                self._remove(state, node)
+            self.move[node] = move
+
+        self.g[node] = g
+        self.f[node] = f
+        bucket = self._bucket(f, g)
+        self.slot[node] = len(bucket)
+        bucket.append(state)
+        self.size += 1
+        if f < self.cursor:
+            self.cursor = f
+        return True
+
+    def pop(self):
+        while True:
+            bucket = self.buckets[self.cursor]
+            if self.largerGFirst:
+                while bucket and not bucket[-1]:
+                    bucket.pop()
+                bucket = bucket[-1] if bucket else bucket
+            if bucket:
+                break
+            self.cursor += 1
+
+        state = bucket.pop()
+        node = self.index[state]
+        self.lastF = self.f[node]
+        self.f[node] = -1
+        self.size -= 1
+        return state, self.g[node]
@@ -0,0 +1,80 @@
+import time
+from dataclasses import dataclass
+
+# Searches poll their budget once every CHECK_MASK + 1 expansions, so a
+# check costs one bit test per node.
+CHECK_MASK = 1023
+
+# Rough bytes held per stored state: a state tuple plus its entries in a
+# DictTable, or the slots of a half-full StateTable. Only used to turn
+# state counts into a memory estimate.
+DICT_STATE_BYTES = 320
+COMPACT_STATE_BYTES = 48
+
+
+class CancelToken:
+    # Shared between the caller and a running search; cancel() may be
+    # called from any thread and the search stops at its next check.
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class OutOfBudget(Exception):
+    # Raised inside a search when its budget runs out; solve() turns it
+    # into an Exhausted result.
+    def __init__(self, reason, nodes, states):
+        super().__init__(f"{reason} budget exhausted after {nodes} nodes")
+        self.reason = reason
+        self.nodes = nodes
+        self.states = states
+
+
+@dataclass(frozen=True)
+class Exhausted:
+    # What solve() returns instead of a solution when the budget ran out.
+    # reason is "time", "nodes", "memory" or "cancelled".
+    reason: str
+    nodesExpanded: int
+    statesStored: int
+    elapsed: float
+
+
+class Budget:
+    # Limits for one search: wall seconds, nodes expanded and an estimate
+    # of the bytes held by its tables, plus an optional CancelToken. None
+    # means no limit. start() is called by solve() and fixes the deadline.
+    def __init__(self, seconds=None, nodes=None, memory=None, token=None):
+        self.seconds = seconds
+        self.nodes = nodes
+        self.memory = memory
+        self.token = token
+        self.started = None
+        self.deadline = None
+        # Nodes spent before the search proper (building a perimeter),
+        # counted towards the node limit.
+        self.charged = 0
+
+    def start(self):
+        self.started = time.monotonic()
+        self.deadline = None if self.seconds is None else self.started + self.seconds
+        self.charged = 0
+        return self
+
+    def charge(self, nodes):
+        self.charged += nodes
+
+    def elapsed(self):
+        return 0.0 if self.started is None else time.monotonic() - self.started
+
+    def check(self, nodes, states, bytesPerState=DICT_STATE_BYTES):
+        if self.token is not None and self.token.cancelled:
+            raise OutOfBudget("cancelled", nodes, states)
+        if self.nodes is not None and nodes + self.charged >= self.nodes:
+            raise OutOfBudget("nodes", nodes + self.charged, states)
+        if self.memory is not None and states * bytesPerState >= self.memory:
+            raise OutOfBudget("memory", nodes, states)
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise OutOfBudget("time", nodes, states)
@@ -1,20 +1,25 @@
+import time
 import pygame, number
-from pygame import mixer
 
 from rushHourGame import RushHourGame
 
-background = pygame.image.load("Resource/starBG.jpeg")
-background = pygame.transform.scale(background, (number.WINDOWWIDTH, number.WINDOWHEIGHT))
-
-pygame.init()
-mixer.init()
+# Built on the first visit and kept, so returning from the menu does not
+# reload the level pack, sprites and widgets.
+game = None
 
 def main():
+    global game
     clock = pygame.time.Clock()
-    game = RushHourGame()
-    
+    switchStart = time.perf_counter()
+    if game is None:
+        game = RushHourGame()
+
     running = True
+    firstFrame = True
     while running and number.currentScreen == 1:
-        
+
         running = game.runFrame()
+        if firstFrame:
+            print(f"Game screen ready after {(time.perf_counter() - switchStart) * 1000:.1f} ms")
+            firstFrame = False
         clock.tick(60)
@@ -7,8 +7,16 @@ class GameState(Enum):
     FINISHED = 4
 
 class Algorithm(Enum):
+    AUTO = "Auto"
     BFS = "BFS"
+    PARALLEL_BFS = "Parallel BFS"
+    FRONTIER_BFS = "Frontier BFS"
     IDS = "IDS"
+    DFS = "DFS"
     UCS = "UCS"
     A_STAR = "A*"
+    PARALLEL_A_STAR = "Parallel A*"
+    ANYTIME_A_STAR = "Anytime A*"
+    BEAM = "Beam"
+    GREEDY = "Greedy"
 
@@ -0,0 +1,134 @@
+class Heuristic:
+    # A heuristic of the form
+    #     h(state) = base(state) + sum of term(state, vid) for vid >= 1
+    # where base depends only on the target car and each term only on the
+    # target car and vehicle vid. A move of any other vehicle changes just
+    # its own term, so update() derives a successor's h from its parent's
+    # in constant time; moves of the target car are re-evaluated in full.
+    # Subclasses override base and term. admissible marks the ones that
+    # never overestimate the moves left, whose A* runs are optimal.
+    admissible = False
+
+    def __init__(self, board):
+        self.board = board
+        self.vehicles = board.vehicles
+        self.redRow = board.vehicles[0].row
+        self.redLength = board.vehicles[0].length
+        self.exitCol = board.size - 1
+        self.others = range(1, len(board.vehicles))
+        self.vertical = [(vid, v.length) for vid, v in enumerate(board.vehicles)
+                         if vid and not v.isHorizontal]
+
+    def base(self, state):
+        # Columns between the target car and the exit.
+        return self.exitCol - (state[1] + self.redLength - 1)
+
+    def term(self, state, vid):
+        return 0
+
+    def __call__(self, state):
+        h = self.base(state)
+        term = self.term
+        for vid in self.others:
+            h += term(state, vid)
+        return h
+
+    def update(self, h, parent, child, vid):
+        if vid == 0:
+            return self(child)
+        return h - self.term(parent, vid) + self.term(child, vid)
+
+    def _crossesRedRow(self, state, vid):
+        v = self.vehicles[vid]
+        if v.isHorizontal:
+            return False
+        row = state[vid << 1]
+        return row <= self.redRow < row + v.length
+
+
+class ZeroHeuristic(Heuristic):
+    # Turns A* into uniform-cost search over unit moves.
+    admissible = True
+
+    def base(self, state):
+        return 0
+
+
+class BlockingHeuristic(Heuristic):
+    # The game's default: the gap to the exit plus 2 for a vertical vehicle
+    # right in front of the target car.
+    def term(self, state, vid):
+        if state[(vid << 1) + 1] != state[1] + self.redLength:
+            return 0
+        return 2 if self._crossesRedRow(state, vid) else 0
+
+    def __call__(self, state):
+        # Same sum as the generic version, inlined because the searches
+        # without incremental updates call it for every state.
+        front = state[1] + self.redLength
+        h = self.exitCol + 1 - front
+        redRow = self.redRow
+        for vid, length in self.vertical:
+            if state[(vid << 1) + 1] == front:
+                row = state[vid << 1]
+                if row <= redRow < row + length:
+                    h += 2
+        return h
+
+
+class BlockersHeuristic(Heuristic):
+    # The gap plus one per vehicle anywhere between the target car and the
+    # exit; each of them needs at least one move, so this is admissible for
+    # unit move costs.
+    admissible = True
+
+    def term(self, state, vid):
+        if state[(vid << 1) + 1] < state[1] + self.redLength:
+            return 0
+        return 1 if self._crossesRedRow(state, vid) else 0
+
+
+class PerimeterHeuristic:
+    # Wraps a heuristic with a goal-side perimeter: exact distances inside
+    # it, and at least bound + 1 outside.
+    def __init__(self, inner, perimeter):
+        self.inner = inner
+        self.perimeter = perimeter
+        self.outside = perimeter.bound + 1
+
+    def __call__(self, state):
+        distance = self.perimeter.distance(state)
+        if distance is not None:
+            return distance
+        return max(self.inner(state), self.outside)
+
+    def update(self, h, parent, child, vid):
+        return self(child)
+
+
+class LearnedHeuristic:
+    # Wraps a heuristic with a DistanceTable (see learnedHeuristic.py):
+    # exact distances where a solve found them, else the larger of the
+    # heuristic and the learned lower bound.
+    def __init__(self, inner, table):
+        self.inner = inner
+        self.entries = table.entries
+        self.pack = table.board.pack
+
+    def __call__(self, state):
+        entry = self.entries.get(self.pack(state))
+        if entry is None:
+            return self.inner(state)
+        if entry & 1:
+            return entry >> 1
+        return max(self.inner(state), entry >> 1)
+
+    def update(self, h, parent, child, vid):
+        return self(child)
+
+
+HEURISTICS = {
+    "zero": ZeroHeuristic,
+    "blocking": BlockingHeuristic,
+    "blockers": BlockersHeuristic,
+}
@@ -0,0 +1,130 @@
+import hashlib
+import os
+from array import array
+
+from vehicle import encodeMove, decodeMove
+from stateTable import NO_MOVE
+
+FORMAT_VERSION = 1
+CACHE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "learned")
+
+# Tables already loaded in this process, by cache key.
+_loaded = {}
+
+
+class DistanceTable:
+    # Distances to the goal learned from earlier optimal solves of a level,
+    # in moves. Every state on a shortest solution gets its exact distance;
+    # every other state an optimal A* reached with g moves gets the lower
+    # bound C* - g, since no solution through it can beat C*. Entries are
+    # bound << 1 | exact, keyed by packed state; a state keeps the best
+    # that any solve has taught it. Exact states also keep the first move
+    # of their shortest solution, which leads to another exact state, so
+    # like a perimeter they can end a search.
+    def __init__(self, board, key, codes=(), entries=(), moves=()):
+        self.board = board
+        self.key = key
+        self.entries = dict(zip(codes, entries))
+        self.moves = {code: move for code, move in zip(codes, moves) if move != NO_MOVE}
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.entries)
+
+    def exact(self, state):
+        entry = self.entries.get(self.board.pack(state))
+        return entry >> 1 if entry is not None and entry & 1 else None
+
+    def tail(self, state):
+        # Moves from an exact state to the goal along the stored moves.
+        path = []
+        code = self.board.pack(state)
+        while self.entries[code] >> 1:
+            vid, delta = decodeMove(self.moves[code])
+            path.append((vid, delta))
+            state = self.board.move(state, vid, delta)
+            code = self.board.pack(state)
+        return path
+
+    def _learn(self, code, bound, exact, move=NO_MOVE):
+        old = self.entries.get(code)
+        if old is None or (exact and not old & 1) or (not old & 1 and bound > old >> 1):
+            self.entries[code] = bound << 1 | exact
+            if exact and move != NO_MOVE:
+                self.moves[code] = move
+            self.dirty = True
+
+    def learnPath(self, start_state, path):
+        # path is a shortest solution from start_state.
+        state = start_state
+        remaining = len(path)
+        for vid, delta in path:
+            self._learn(self.board.pack(state), remaining, True, encodeMove(vid, delta))
+            state = self.board.move(state, vid, delta)
+            remaining -= 1
+        self._learn(self.board.pack(state), 0, True)
+
+    def learnBounds(self, costs, optimal):
+        # costs yields (packed state, g) for every state an A* with an
+        # admissible heuristic reached before proving optimal moves.
+        for code, g in costs:
+            if g < optimal:
+                self._learn(code, optimal - g, False)
+
+
+def tableKey(board):
+    # Only the lanes matter, not where the vehicles start, so every
+    # position of a level (a mid-playback one included) shares a table.
+    lanes = [(v.length, v.isHorizontal, v.row if v.isHorizontal else v.col) for v in board.vehicles]
+    description = repr((FORMAT_VERSION, board.size, lanes))
+    return hashlib.sha1(description.encode()).hexdigest()[:16]
+
+
+def _read(path):
+    with open(path, "rb") as file:
+        count = array('q')
+        count.fromfile(file, 1)
+        codes, entries, moves = array('q'), array('H'), array('b')
+        codes.fromfile(file, count[0])
+        entries.fromfile(file, count[0])
+        moves.fromfile(file, count[0])
+    return codes, entries, moves
+
+
+def loadLearned(board, directory=CACHE_DIRECTORY):
+    # The table for this board's level, from memory or disk; empty when no
+    # solve has taught it anything yet.
+    key = tableKey(board)
+    table = _loaded.get(key)
+    if table is not None:
+        table.board = board
+        return table
+    try:
+        columns = _read(os.path.join(directory, f"{key}.bin"))
+    except (OSError, EOFError):
+        columns = ()
+    table = _loaded[key] = DistanceTable(board, key, *columns)
+    return table
+
+
+def saveLearned(table, directory=CACHE_DIRECTORY):
+    # Merges in whatever other processes saved since this one loaded the
+    # table, then rewrites the file.
+    path = os.path.join(directory, f"{table.key}.bin")
+    try:
+        for code, entry, move in zip(*_read(path)):
+            table._learn(code, entry >> 1, entry & 1, move)
+    except (OSError, EOFError):
+        pass
+    os.makedirs(directory, exist_ok=True)
+    codes = array('q', table.entries)
+    entries = array('H', (table.entries[code] for code in codes))
+    moves = array('b', (table.moves.get(code, NO_MOVE) for code in codes))
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "wb") as file:
+        array('q', [len(codes)]).tofile(file)
+        codes.tofile(file)
+        entries.tofile(file)
+        moves.tofile(file)
+    os.replace(temp, path)
+    table.dirty = False
@@ -0,0 +1,141 @@
+import hashlib
+
+from heuristics import BlockingHeuristic
+
+# Levels compiled in this process, by levelKey.
+_compiled = {}
+
+
+class CompiledLevel:
+    # Successor generator, goal test and blocking heuristic generated for
+    # one level and set of active vehicles. Board positions are bit
+    # indices (row * size + col); each vehicle's occupancy mask, lane
+    # bounds and the cells it can enter are constants in the source, and
+    # the loop over vehicles is unrolled. source keeps the generated code.
+    def __init__(self, key, source, namespace):
+        self.key = key
+        self.source = source
+        self.iterSuccessors = namespace["iterSuccessors"]
+        self.isGoal = namespace["isGoal"]
+        self.blocking = namespace["blocking"]
+
+
+def levelKey(board):
+    description = repr((board.size, board.vehicles, tuple(board.activeVehicles)))
+    return hashlib.sha1(description.encode()).hexdigest()[:16]
+
+
+def _lane(board, vid):
+    # (state index of the lane position, occupancy mask at position 0 as a
+    # source expression, and per direction the bit index entered from
+    # position p as (multiplier of p, constant)).
+    n = board.size
+    v = board.vehicles[vid]
+    if v.isHorizontal:
+        mask = ((1 << v.length) - 1) << (v.row * n)
+        return (vid << 1) + 1, f"({mask} << s{(vid << 1) + 1})", (1, v.row * n - 1), (1, v.row * n + v.length)
+    mask = sum(1 << (k * n + v.col) for k in range(v.length))
+    return vid << 1, f"({mask} << s{vid << 1} * {n})", (n, v.col - n), (n, v.length * n + v.col)
+
+
+def generateSource(board):
+    n = board.size
+    count = len(board.vehicles)
+    names = [f"s{i}" for i in range(2 * count)]
+    lanes = [_lane(board, vid) for vid in range(count)]
+    active = list(board.activeVehicles)
+
+    # Bit index a move code's vehicle would enter moving back, i.e. the
+    # cell that move just left: base + mul * state[index].
+    vacatedIndex, vacatedMul, vacatedBase = [], [], []
+    for vid in range(count):
+        index, _, back, front = lanes[vid]
+        for mul, base in (front, back):
+            vacatedIndex.append(index)
+            vacatedMul.append(mul)
+            vacatedBase.append(base)
+
+    lines = [
+        f"_VINDEX = {tuple(vacatedIndex)}",
+        f"_VMUL = {tuple(vacatedMul)}",
+        f"_VBASE = {tuple(vacatedBase)}",
+        "",
+        "def iterSuccessors(state, lastMove=-1):",
+        f"    {', '.join(names)}, = state",
+        "    occ = " + " | ".join(lane[1] for lane in lanes),
+        "    if lastMove < 0:",
+        "        last = vacated = -1",
+        "    else:",
+        "        last = lastMove >> 1",
+        "        vacated = _VBASE[lastMove] + _VMUL[lastMove] * state[_VINDEX[lastMove]]",
+    ]
+    for vid in active:
+        v = board.vehicles[vid]
+        index, _, back, front = lanes[vid]
+        pos = names[index]
+        prune = "" if vid == active[-1] else f" and (last <= {vid} or e == vacated)"
+        for delta, bound, (mul, base) in ((-1, f"{pos} > 0", back), (1, f"{pos} < {n - v.length}", front)):
+            moved = list(names)
+            moved[index] = f"{pos} {'-' if delta < 0 else '+'} 1"
+            offset = f" * {mul}" if mul != 1 else ""
+            lines += [
+                f"    if {bound}:",
+                f"        e = {pos}{offset} {'-' if base < 0 else '+'} {abs(base)}",
+                f"        if not occ >> e & 1{prune}:",
+                f"            yield ({', '.join(moved)}), ({vid}, {delta})",
+            ]
+
+    red = board.vehicles[0]
+    lines += [
+        "",
+        "def isGoal(state):",
+        f"    return state[1] == {n - red.length}",
+        "",
+        "def blocking(state):",
+        f"    front = state[1] + {red.length}",
+        f"    h = {n} - front",
+    ]
+    for vid, v in enumerate(board.vehicles):
+        if vid and not v.isHorizontal:
+            lines += [
+                f"    if front == {v.col} and {red.row - v.length} < state[{vid << 1}] <= {red.row}:",
+                "        h += 2",
+            ]
+    lines.append("    return h")
+    return "\n".join(lines) + "\n"
+
+
+def compileLevel(board):
+    # The compiled functions for this board's level and active vehicles,
+    # generated once per process.
+    key = levelKey(board)
+    level = _compiled.get(key)
+    if level is None:
+        source = generateSource(board)
+        namespace = {}
+        exec(compile(source, f"<level {key}>", "exec"), namespace)
+        level = _compiled[key] = CompiledLevel(key, source, namespace)
+    return level
+
+
+def specialise(board):
+    # Replaces the board's generic successor generator, goal test and (if
+    # it is the default) heuristic with the compiled ones. Has to be redone
+    # whenever board.activeVehicles changes; generic() undoes it.
+    generic(board)
+    level = compileLevel(board)
+    board.compiledLevel = level
+    board.iterSuccessors = level.iterSuccessors
+    board.isGoal = level.isGoal
+    if isinstance(board.h, BlockingHeuristic):
+        board.h = level.blocking
+    return level
+
+
+def generic(board):
+    level = board.__dict__.pop("compiledLevel", None)
+    if level is None:
+        return
+    del board.iterSuccessors, board.isGoal
+    if board.h is level.blocking:
+        board.h = BlockingHeuristic(board)
@@ -0,0 +1,267 @@
+import mmap
+import os
+import re
+import struct
+import sys
+from collections import deque
+from dataclasses import dataclass
+
+from vehicle import Vehicle, Board
+
+# Pack layout (little endian):
+#   header  : magic, version, level count, index offset
+#   records : per level, 4 bytes per vehicle (row, col, length, flags)
+#             followed by 2 bytes per solution move (vid, signed delta)
+#   names   : utf-8 level names, back to back
+#   index   : one fixed-size entry per level, so level i is found with
+#             a single unpack_from at indexOffset + i * INDEX.size
+MAGIC = b"RHPK"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+INDEX = struct.Struct("<IIBBBxIHHHxxI")
+VEHICLE = struct.Struct("<BBBB")
+MOVE = struct.Struct("<Bb")
+
+FLAG_HORIZONTAL = 1
+NO_SOLUTION = 0xFFFF
+
+
+@dataclass(frozen=True)
+class LevelInfo:
+    name: str
+    size: int
+    vehicleCount: int
+    reachableStates: int
+    optimalMoves: int     # NO_SOLUTION when the level is unsolvable
+    optimalCost: int
+    solution: tuple
+
+
+def parseLevel(lines):
+    vehicles = []
+    for line in lines:
+        parts = line.strip().split()
+        if len(parts) == 4:
+            row, col, length, orientation = int(parts[0]), int(parts[1]), int(parts[2]), parts[3]
+            vehicles.append(Vehicle(len(vehicles), row, col, length, orientation == 'H'))
+    return vehicles
+
+
+def validateLevel(lines, size=6):
+    # parseLevel for layouts from outside, e.g. the solve server: every
+    # non-blank line must be "row col length H|V", each vehicle must fit
+    # on the board without overlapping another, and the target car (the
+    # first line) must be horizontal. Raises ValueError naming the first
+    # problem, otherwise returns the vehicles.
+    vehicles = []
+    occupied = set()
+    for number, line in enumerate(lines, 1):
+        parts = line.split()
+        if not parts:
+            continue
+        if len(parts) != 4 or parts[3] not in ("H", "V"):
+            raise ValueError(f"line {number}: expected 'row col length H|V', got {line.strip()!r}")
+        try:
+            row, col, length = int(parts[0]), int(parts[1]), int(parts[2])
+        except ValueError:
+            raise ValueError(f"line {number}: row, col and length must be integers") from None
+        horizontal = parts[3] == "H"
+        if not 2 <= length <= size:
+            raise ValueError(f"line {number}: length must be between 2 and {size}")
+        cells = [(row, col + k) if horizontal else (row + k, col) for k in range(length)]
+        if any(not (0 <= r < size and 0 <= c < size) for r, c in cells):
+            raise ValueError(f"line {number}: vehicle does not fit on the {size}x{size} board")
+        if occupied.intersection(cells):
+            raise ValueError(f"line {number}: vehicle overlaps another")
+        occupied.update(cells)
+        vehicles.append(Vehicle(len(vehicles), row, col, length, horizontal))
+    if not vehicles:
+        raise ValueError("layout has no vehicles")
+    if not vehicles[0].isHorizontal:
+        raise ValueError("the target car (first line) must be horizontal")
+    return vehicles
+
+
+def loadLevelFile(path):
+    with open(path, 'r') as file:
+        return parseLevel(file.readlines())
+
+
+def initialState(vehicles):
+    return tuple(coord for v in vehicles for coord in (v.row, v.col))
+
+
+def countReachable(board, start_state):
+    seen = {start_state}
+    queue = deque([start_state])
+    while queue:
+        for next_state, _ in board.successors(queue.popleft()):
+            if next_state not in seen:
+                seen.add(next_state)
+                queue.append(next_state)
+    return len(seen)
+
+
+def goalDistances(board, start_state):
+    # Optimal move count to the goal for every state reachable from start,
+    # by a multi-source BFS back from the goal states of the component.
+    # Empty when no goal is reachable.
+    component = [start_state]
+    seen = {start_state}
+    for state in component:
+        for next_state, _ in board.iterSuccessors(state):
+            if next_state not in seen:
+                seen.add(next_state)
+                component.append(next_state)
+
+    distances = {state: 0 for state in component if board.isGoal(state)}
+    queue = deque(distances)
+    while queue:
+        state = queue.popleft()
+        for next_state, _ in board.iterSuccessors(state):
+            if next_state not in distances:
+                distances[next_state] = distances[state] + 1
+                queue.append(next_state)
+    return distances
+
+
+def analyseLevel(name, vehicles, size=6):
+    board = Board(vehicles, size)
+    start = initialState(vehicles)
+    reachable = countReachable(board, start)
+
+    moves = board.bfs(start)
+    if moves is None:
+        return LevelInfo(name, size, len(vehicles), reachable, NO_SOLUTION, NO_SOLUTION, ())
+
+    _, cost = board.ucs(start)
+    return LevelInfo(name, size, len(vehicles), reachable, len(moves), cost, tuple(moves))
+
+
+def writePack(path, levels):
+    """levels is a list of (LevelInfo, vehicles) pairs."""
+    body = bytearray()
+    entries = []
+
+    for info, vehicles in levels:
+        dataOffset = HEADER.size + len(body)
+        for v in vehicles:
+            body += VEHICLE.pack(v.row, v.col, v.length, FLAG_HORIZONTAL if v.isHorizontal else 0)
+        solutionOffset = HEADER.size + len(body)
+        for vid, delta in info.solution:
+            body += MOVE.pack(vid, delta)
+        entries.append((info, dataOffset, solutionOffset))
+
+    names = bytearray()
+    nameOffsets = []
+    for info, _, _ in entries:
+        encoded = info.name.encode("utf-8")
+        nameOffsets.append((HEADER.size + len(body) + len(names), len(encoded)))
+        names += encoded
+
+    indexOffset = HEADER.size + len(body) + len(names)
+    index = bytearray()
+    for (info, dataOffset, solutionOffset), (nameOffset, nameLen) in zip(entries, nameOffsets):
+        index += INDEX.pack(
+            dataOffset, nameOffset, nameLen, info.size, info.vehicleCount,
+            info.reachableStates, info.optimalMoves, info.optimalCost,
+            len(info.solution), solutionOffset
+        )
+
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(entries), indexOffset))
+        file.write(body)
+        file.write(names)
+        file.write(index)
+
+
+class LevelPack:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.count, self.indexOffset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a level pack (version {VERSION})")
+
+        self._names = None
+
+    @classmethod
+    def openIfExists(cls, path):
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls(path)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Ignoring level pack {path}: {e}")
+            return None
+
+    def __len__(self):
+        return self.count
+
+    def _entry(self, i):
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return INDEX.unpack_from(self._map, self.indexOffset + i * INDEX.size)
+
+    def name(self, i):
+        entry = self._entry(i)
+        return self._map[entry[1]:entry[1] + entry[2]].decode("utf-8")
+
+    def names(self):
+        if self._names is None:
+            self._names = {self.name(i): i for i in range(self.count)}
+        return list(self._names)
+
+    def indexOf(self, name):
+        self.names()
+        return self._names.get(name)
+
+    def vehicles(self, i):
+        dataOffset, _, _, _, vehicleCount = self._entry(i)[:5]
+        vehicles = []
+        for vid in range(vehicleCount):
+            row, col, length, flags = VEHICLE.unpack_from(self._map, dataOffset + vid * VEHICLE.size)
+            vehicles.append(Vehicle(vid, row, col, length, bool(flags & FLAG_HORIZONTAL)))
+        return vehicles
+
+    def info(self, i):
+        (_, _, _, size, vehicleCount, reachable, optimalMoves,
+         optimalCost, solutionLength, solutionOffset) = self._entry(i)
+        solution = tuple(
+            MOVE.unpack_from(self._map, solutionOffset + k * MOVE.size)
+            for k in range(solutionLength)
+        )
+        return LevelInfo(self.name(i), size, vehicleCount, reachable,
+                         optimalMoves, optimalCost, solution)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def levelFiles(directory):
+    names = [f for f in os.listdir(directory) if f.endswith(".txt")]
+    return sorted(names, key=lambda f: [int(t) if t.isdigit() else t for t in re.split(r"(\d+)", f)])
+
+
+def buildPack(directory, path):
+    levels = []
+    for filename in levelFiles(directory):
+        vehicles = loadLevelFile(os.path.join(directory, filename))
+        info = analyseLevel(filename, vehicles)
+        print(f"{filename}: {info.vehicleCount} vehicles, {info.reachableStates} states, "
+              f"{info.optimalMoves} moves, cost {info.optimalCost}")
+        levels.append((info, vehicles))
+    writePack(path, levels)
+    return len(levels)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: python levelPack.py <map directory> <output.pack>")
+        sys.exit(1)
+    count = buildPack(sys.argv[1], sys.argv[2])
+    print(f"Wrote {count} levels to {sys.argv[2]}")
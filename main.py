@@ -1,6 +1,6 @@
+import assets
 import pygame, number
 from pygame.locals import *
-from pygame import mixer
 import mainMenu,  option
 import game
 
@@ -8,26 +8,20 @@ WHITE = (255, 255, 255)
 RED   = (255,   0,   0)
 GREEN = (  0, 255,   0)
 
-pygame.init()
-mixer.init()
+assets.init()
 
 FPS = 60
 fpsClock = pygame.time.Clock()
 
-screen = pygame.display.set_mode((number.WINDOWWIDTH, number.WINDOWHEIGHT))
-pygame.display.set_caption('Rush Hour Solver')
-background = pygame.image.load("Resource/background.jpg")
-background = pygame.transform.scale(background, (number.WINDOWWIDTH, number.WINDOWHEIGHT))
-
-icon = pygame.image.load("Resource/icon.png")
-pygame.display.set_icon(icon)
-
-
-number.Sound.mainSound.set_volume(number.Sound.soundMusic/float(100))
-number.Sound.mainChannel.play(number.Sound.mainSound)
-number.Sound.mainSound.play(loops=-1)
+screen = assets.display()
 
+firstFrame = True
 while True:
     if number.currentScreen == 0: mainMenu.mainmenux()
     if number.currentScreen == 1: game.main()
     if number.currentScreen == 2: option.main()
+
+    if firstFrame:
+        firstFrame = False
+        print(f"First menu frame after {assets.sinceLaunch():.0f} ms")
+        assets.playMusic("Resource/music.mp3", number.Sound.soundMusic/float(100))
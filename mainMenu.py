@@ -1,5 +1,6 @@
 import pygame, sys
 import os, number
+import assets
 
 DARK_BG = (16, 24, 40)        
 CARD_BG = (239, 68, 68)       
@@ -9,21 +10,9 @@ WHITE = (255, 255, 255)
 LIGHT_GRAY = (212, 213, 216)
 TRANSPARENT = (0, 0, 0, 0)
 
-pygame.init()
-
 FPS = 60
 fpsClock = pygame.time.Clock()
 
-screen = pygame.display.set_mode((number.WINDOWWIDTH, number.WINDOWHEIGHT))
-pygame.display.set_caption('Rush Hour Solver')
-
-icon = pygame.image.load("Resource/icon.png")
-pygame.display.set_icon(icon)
-
-fontHeading = pygame.font.SysFont('Arial', 70, bold=True)
-fontSubheading = pygame.font.SysFont('Arial', 30, bold=True)
-fontInline = pygame.font.SysFont('Arial', 28, bold=True)
-
 def drawRoundedRect(surface, color, rect, radius=15):
     rect = pygame.Rect(rect)
     pygame.draw.rect(surface, color, rect, border_radius=radius)
@@ -72,36 +61,42 @@ class Button:
             return True
         return False
 
-playButton = Button(
-    number.WINDOWWIDTH//2 - 175, number.WINDOWHEIGHT//2 + 40, 
-    350, 60, "Play Game", fontInline
-)
+playButton = None
+exitButton = None
+titleText = None
+
+def setup():
+    # Fonts, buttons and the rendered title are built on the first frame
+    # rather than at import, so importing the menu stays cheap.
+    global playButton, exitButton, titleText
+    fontInline = assets.font(28, 'Arial', bold=True)
 
-# optionsButton = Button(
-#     number.WINDOWWIDTH//2 - 175, number.WINDOWHEIGHT//2 + 120, 
-#     350, 60, "Options", fontInline
-# )
+    playButton = Button(
+        number.WINDOWWIDTH//2 - 175, number.WINDOWHEIGHT//2 + 40, 
+        350, 60, "Play Game", fontInline
+    )
 
-exitButton = Button(
-    number.WINDOWWIDTH//2 - 175, number.WINDOWHEIGHT//2 + 120, 
-    350, 60, "Exit", fontInline
-)
+    # optionsButton = Button(
+    #     number.WINDOWWIDTH//2 - 175, number.WINDOWHEIGHT//2 + 120, 
+    #     350, 60, "Options", fontInline
+    # )
 
-playIcon = pygame.image.load('Resource/playIcon2.jpg')
-playIcon = pygame.transform.scale(playIcon, (60, 60))
-settingIcon = pygame.image.load('Resource/setting.png')
-settingIcon = pygame.transform.scale(settingIcon, (50, 50))
-exitIcon = pygame.image.load('Resource/exit2.png')
-exitIcon = pygame.transform.scale(exitIcon, (50, 50))
+    exitButton = Button(
+        number.WINDOWWIDTH//2 - 175, number.WINDOWHEIGHT//2 + 120, 
+        350, 60, "Exit", fontInline
+    )
 
-background = pygame.image.load("Resource/background2.jpg")
-background = pygame.transform.scale(background, (number.WINDOWWIDTH, number.WINDOWHEIGHT))
+    titleText = renderGradientText("Rush Hour Solver", assets.font(70, 'Arial', bold=True), ACCENT_RED, ACCENT_ORANGE)
 
 def mainmenux():
+    if playButton is None:
+        setup()
+
     click = False
     mousePosition = pygame.mouse.get_pos()
+    screen = assets.display()
     
-    screen.blit(background, (0, 0))
+    screen.blit(assets.image("Resource/background2.jpg", (number.WINDOWWIDTH, number.WINDOWHEIGHT)), (0, 0))
     
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
@@ -115,10 +110,9 @@ def mainmenux():
                 pass
     
 
-    titleText = renderGradientText("Rush Hour Solver", fontHeading, ACCENT_RED, ACCENT_ORANGE)
     screen.blit(titleText, (500, 60))
     
-    subtitle = fontSubheading.render("AI-powered traffic puzzle solver", True, LIGHT_GRAY)
+    subtitle = assets.font(30, 'Arial', bold=True).render("AI-powered traffic puzzle solver", True, LIGHT_GRAY)
     screen.blit(subtitle, (550, 150))
     
     playButton.draw(screen, mousePosition)
@@ -131,7 +125,7 @@ def mainmenux():
         pygame.quit()
         sys.exit()
         
-    screen.blit(playIcon, (600, 538))
-    screen.blit(exitIcon, (620, 625))
+    screen.blit(assets.image('Resource/playIcon2.jpg', (60, 60)), (600, 538))
+    screen.blit(assets.image('Resource/exit2.png', (50, 50), alpha=True), (620, 625))
     pygame.display.update()
     fpsClock.tick(FPS)
\ No newline at end of file
@@ -1,19 +1,24 @@
-import pygame, sys
 from pygame import mixer
 
-pygame.init()
-mixer.init()
-
 currentScreen = 0
 
 WINDOWWIDTH = 1500 
 WINDOWHEIGHT = 1000 
 
+class Lazy():
+    # Class attribute that is only created on first access.
+    def __init__(self, load):
+        self.load = load
+        self.value = None
+
+    def __get__(self, obj, owner):
+        if self.value is None:
+            self.value = self.load()
+        return self.value
+
 class Sound():
-    mainSound = mixer.Sound("Resource/music.mp3")
-    mainChannel = mixer.find_channel()
-    clickSound = mixer.Sound("Resource/click.mp3")
-    clickChannel = mixer.find_channel()
+    clickSound = Lazy(lambda: mixer.Sound("Resource/click.mp3"))
+    clickChannel = Lazy(mixer.find_channel)
     soundMaster = 100
     soundMusic = 10
     soundEffects = 100
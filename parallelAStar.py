@@ -0,0 +1,225 @@
+import heapq
+import multiprocessing
+import os
+import queue
+import time
+
+from budget import OutOfBudget
+from vehicle import Board, encodeMove
+from levelCompiler import specialise
+from heuristics import HEURISTICS
+from stateTable import FIBONACCI, MASK64, NO_MOVE
+
+# Hash-distributed A* (HDA*). Every packed state has one owner process,
+# chosen by hashing it, and only the owner keeps its g-value, parent move
+# and open-list entry. Successors owned elsewhere are buffered and shipped
+# to their owner in batches. Termination is detected by the coordinator
+# with probe waves (see _finished), so the search only stops once no open
+# node anywhere can beat the incumbent. With an admissible heuristic (the
+# default blockers one) the result is optimal; with any other it is only
+# some solution, and may differ between runs.
+
+BATCH_SIZE = 256
+FLUSH_EVERY = 512
+PROBE_INTERVAL = 0.01
+
+
+def owner(code, workers):
+    return (((code * FIBONACCI) & MASK64) >> 32) % workers
+
+
+def _worker(wid, vehicles, size, active, heuristic, inboxes, results):
+    board = Board(vehicles, size)
+    board.activeVehicles = active
+    specialise(board)
+    h = HEURISTICS[heuristic](board)
+    workers = len(inboxes)
+    inbox = inboxes[wid]
+    gValues = {}
+    moves = {}
+    openList = []
+    outboxes = [[] for _ in range(workers)]
+    bound = float('inf')
+    sent = received = expanded = 0
+    busyTime = 0.0
+
+    def consider(code, g, move):
+        if g < bound and g < gValues.get(code, g + 1):
+            gValues[code] = g
+            moves[code] = move
+            heapq.heappush(openList, (g + h(board.unpack(code)), -g, code))
+
+    def flush(target):
+        nonlocal sent
+        if outboxes[target]:
+            inboxes[target].put(("states", outboxes[target]))
+            outboxes[target] = []
+            sent += 1
+
+    def idle():
+        return not any(outboxes) and (not openList or openList[0][0] >= bound)
+
+    while True:
+        try:
+            message = inbox.get(block=idle(), timeout=1.0)
+        except queue.Empty:
+            message = None
+
+        if message is not None:
+            kind = message[0]
+            if kind == "states":
+                received += 1
+                for code, g, move in message[1]:
+                    consider(code, g, move)
+            elif kind == "bound":
+                bound = min(bound, message[1])
+            elif kind == "probe":
+                results.put(("status", wid, message[1], idle(), sent, received, expanded, len(gValues)))
+            elif kind == "trace":
+                results.put(("trace", moves.get(message[1], NO_MOVE)))
+            elif kind == "stop":
+                results.put(("done", wid, expanded, busyTime))
+                return
+            continue
+
+        # Expand a slice of local work, then go back to the inbox so probes
+        # and incoming states are never starved.
+        started = time.perf_counter()
+        for _ in range(FLUSH_EVERY):
+            if not openList or openList[0][0] >= bound:
+                break
+            f, negG, code = heapq.heappop(openList)
+            g = -negG
+            if g > gValues[code]:
+                continue
+            expanded += 1
+            state = board.unpack(code)
+            if board.isGoal(state):
+                bound = g
+                results.put(("goal", code, g))
+                for other in range(workers):
+                    if other != wid:
+                        inboxes[other].put(("bound", g))
+                continue
+            for nextState, (vid, delta) in board.iterSuccessors(state):
+                nextCode = board.pack(nextState)
+                target = owner(nextCode, workers)
+                move = encodeMove(vid, delta)
+                if target == wid:
+                    consider(nextCode, g + 1, move)
+                else:
+                    outboxes[target].append((nextCode, g + 1, move))
+                    if len(outboxes[target]) >= BATCH_SIZE:
+                        flush(target)
+        for target in range(workers):
+            flush(target)
+        busyTime += time.perf_counter() - started
+
+
+class _RemoteParents:
+    # Lets Board._reconstruct_path ask each state's owner for its parent move.
+    def __init__(self, board, inboxes, results):
+        self.board = board
+        self.inboxes = inboxes
+        self.results = results
+
+    def parentMove(self, state):
+        code = self.board.pack(state)
+        self.inboxes[owner(code, len(self.inboxes))].put(("trace", code))
+        return self.results.get()[1]
+
+
+def _finished(previous, current, seeded=1):
+    # Two consecutive probe waves in which every worker was idle, no
+    # worker's message counters changed and every batch sent (including
+    # the coordinator's seed batch) was received: no work is left and none
+    # is in flight.
+    if previous is None:
+        return False
+    if any(not status[0] for status in previous + current) or previous != current:
+        return False
+    return seeded + sum(status[1] for status in current) == sum(status[2] for status in current)
+
+
+def parallelAStar(board, start_state, workers=None, heuristic="blockers"):
+    # Returns (moves, totalCost) like Board.aStar, or None. heuristic is a
+    # HEURISTICS name; only an admissible one guarantees fewest moves. Sets
+    # board.nodesExpanded to the total over all workers and
+    # board.workerStats to per-worker expansions and nodes per second.
+    # board.budget is checked against the workers' totals once per probe
+    # wave; when it runs out the workers are stopped and OutOfBudget raised.
+    workers = workers or os.cpu_count() or 1
+    # Fork where available: the GUI's main.py runs its loop at import, so a
+    # spawned child re-importing it would open a second window.
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    inboxes = [context.Queue() for _ in range(workers)]
+    results = context.Queue()
+    processes = [
+        context.Process(target=_worker, daemon=True,
+                        args=(wid, board.vehicles, board.size, list(board.activeVehicles), heuristic,
+                              inboxes, results))
+        for wid in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    startTime = time.perf_counter()
+    startCode = board.pack(start_state)
+    inboxes[owner(startCode, workers)].put(("states", [(startCode, 0, NO_MOVE)]))
+
+    goal = None
+    bestG = float('inf')
+    wave = 0
+    previous = None
+    exhausted = None
+    while True:
+        wave += 1
+        for inbox in inboxes:
+            inbox.put(("probe", wave))
+        statuses = {}
+        while len(statuses) < workers:
+            message = results.get()
+            if message[0] == "goal" and message[2] < bestG:
+                goal, bestG = message[1], message[2]
+            elif message[0] == "status" and message[2] == wave:
+                statuses[message[1]] = message[3:]
+        current = [statuses[wid] for wid in range(workers)]
+        if _finished(previous, current):
+            break
+        if board.budget is not None:
+            try:
+                board.budget.check(sum(status[3] for status in current),
+                                   sum(status[4] for status in current), board.stateBytes)
+            except OutOfBudget as e:
+                exhausted = e
+                break
+        previous = current
+        time.sleep(PROBE_INTERVAL)
+    elapsed = time.perf_counter() - startTime
+
+    path = None
+    if goal is not None and exhausted is None:
+        path = board._reconstruct_path(_RemoteParents(board, inboxes, results), board.unpack(goal))
+
+    for inbox in inboxes:
+        inbox.put(("stop",))
+    stats = {}
+    while len(stats) < workers:
+        message = results.get()
+        if message[0] == "done":
+            stats[message[1]] = message[2:]
+    for process in processes:
+        process.join()
+
+    board.nodesExpanded = sum(expanded for expanded, _ in stats.values())
+    board.workerStats = [
+        {"worker": wid, "expanded": stats[wid][0], "busy": stats[wid][1],
+         "nodesPerSecond": stats[wid][0] / elapsed if elapsed else 0.0}
+        for wid in range(workers)
+    ]
+    if exhausted is not None:
+        raise exhausted
+    if path is None:
+        return None
+    return path, sum(board.vehicles[vid].length for vid, _ in path)
@@ -0,0 +1,136 @@
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from vehicle import Board
+from vectorBfs import MoveTables, expandLayer, layeredBfs
+
+# Layers smaller than this are expanded in the coordinator; below it the
+# round trip to the pool costs more than the expansion itself.
+MIN_PARALLEL_LAYER = 4096
+
+
+class SharedArray:
+    # int64 array in a shared memory block that worker processes attach to
+    # by name. It is reallocated (under a new name) when it has to grow, to
+    # at least twice its size so a growing search rarely reallocates.
+    def __init__(self, capacity=1):
+        self.shm = None
+        self.reserve(capacity)
+
+    def reserve(self, capacity):
+        if self.shm is not None:
+            if capacity <= self.capacity:
+                return
+            capacity = max(capacity, 2 * self.capacity)
+        self.release()
+        self.capacity = max(1, capacity)
+        self.shm = shared_memory.SharedMemory(create=True, size=self.capacity * 8)
+        self.array = np.ndarray(self.capacity, dtype=np.int64, buffer=self.shm.buf)
+
+    def fill(self, values):
+        self.reserve(len(values))
+        self.array[:len(values)] = values
+        return self.shm.name, len(values)
+
+    def release(self):
+        if self.shm is not None:
+            self.array = None
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+_worker = None
+_attached = {}
+
+
+def _initWorker(vehicles, size, active):
+    global _worker
+    board = Board(vehicles, size)
+    _worker = (MoveTables(board), board.laneBits, active)
+
+
+def _detachStale(names):
+    # Closes the blocks no longer in use, which the coordinator has already
+    # unlinked after growing them; otherwise they would stay mapped for the
+    # life of the pool.
+    for name in [name for name in _attached if name not in names]:
+        _attached.pop(name).close()
+
+
+def _view(name, length):
+    shm = _attached.get(name)
+    if shm is None:
+        shm = _attached[name] = shared_memory.SharedMemory(name=name)
+    return np.ndarray(length, dtype=np.int64, buffer=shm.buf)
+
+
+def _expandSlice(task):
+    # Expands layer[start:stop] and writes the new states to the front of
+    # the output block and their ranks to its second half.
+    start, stop, layerRef, currentRef, previousRef, lastRef, outName, capacity = task
+    tables, bits, active = _worker
+    _detachStale({ref[0] for ref in (layerRef, currentRef, previousRef, lastRef) if ref is not None} | {outName})
+    layer = _view(*layerRef)[start:stop]
+    lastMoves = _view(*lastRef)[start:stop] if lastRef is not None else None
+    states, ranks = expandLayer(tables, bits, active, layer, _view(*currentRef), _view(*previousRef), start,
+                                lastMoves)
+    out = _view(outName, 2 * capacity)
+    out[:len(states)] = states
+    out[capacity:capacity + len(ranks)] = ranks
+    return len(states)
+
+
+def parallelBfs(board, start_state, workers=None):
+    # layeredBfs with each large layer split into one slice per worker.
+    # The layer and the two sorted layers used for duplicate removal are
+    # copied once into shared memory and every worker writes its successors
+    # into its own shared output block, so only slice bounds and block
+    # names are pickled. Slices are concatenated in order, so the ranks stay
+    # sorted and keeping each state's first occurrence reproduces the
+    # serial discovery order, path and expansion count.
+    workers = workers or os.cpu_count() or 1
+    tables = MoveTables(board)
+    active = list(board.activeVehicles)
+    moves = 2 * len(active)
+    layerBuffer, currentBuffer, previousBuffer, lastBuffer = (SharedArray() for _ in range(4))
+    outputs = [SharedArray() for _ in range(workers)]
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    pool = context.Pool(workers, initializer=_initWorker, initargs=(board.vehicles, board.size, active))
+
+    def expand(layer, current, previous, lastMoves):
+        if len(layer) < MIN_PARALLEL_LAYER or workers == 1:
+            return expandLayer(tables, board.laneBits, active, layer, current, previous, lastMoves=lastMoves)
+
+        refs = (layerBuffer.fill(layer), currentBuffer.fill(current), previousBuffer.fill(previous),
+                lastBuffer.fill(lastMoves) if lastMoves is not None else None)
+        bounds = np.linspace(0, len(layer), workers + 1).astype(int)
+        tasks = []
+        for k in range(workers):
+            capacity = (bounds[k + 1] - bounds[k]) * moves
+            outputs[k].reserve(2 * capacity)
+            tasks.append((bounds[k], bounds[k + 1]) + refs + (outputs[k].shm.name, capacity))
+
+        counts = pool.map(_expandSlice, tasks)
+        states = np.concatenate([outputs[k].array[:n] for k, n in enumerate(counts)])
+        ranks = np.concatenate([outputs[k].array[task[-1]:task[-1] + n]
+                                for k, (n, task) in enumerate(zip(counts, tasks))])
+        _, first = np.unique(states, return_index=True)
+        first.sort()
+        return states[first], ranks[first]
+
+    try:
+        return layeredBfs(board, start_state, expand)
+    finally:
+        pool.terminate()
+        pool.join()
+        for buffer in [layerBuffer, currentBuffer, previousBuffer, lastBuffer] + outputs:
+            buffer.release()
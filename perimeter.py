@@ -0,0 +1,238 @@
+import hashlib
+import heapq
+import os
+import warnings
+from array import array
+from collections import deque
+
+from vehicle import encodeMove, decodeMove
+from stateTable import NO_MOVE
+from budget import CHECK_MASK
+
+FORMAT_VERSION = 3
+CACHE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "perimeter")
+# The disk cache drops its least recently used files beyond this size.
+CACHE_BYTES = 64 << 20
+
+# Perimeters already built or loaded in this process, by cache key.
+_loaded = {}
+
+
+class Perimeter:
+    # Every state within `bound` of a goal, with its exact distance to the
+    # nearest goal and the move that starts a shortest way there. Distances
+    # count moves, or move costs (vehicle lengths) when byCost is set, so
+    # any state not in the perimeter is at least bound + 1 from a goal.
+    # Keys are packed states; minRedCol is the leftmost target car column
+    # of any member, a cheap test that skips most lookups.
+    def __init__(self, board, bound, byCost, codes, distances, moves):
+        self.board = board
+        self.bound = bound
+        self.byCost = byCost
+        self.entries = {code: (distance, move) for code, distance, move in zip(codes, distances, moves)}
+        laneMask = (1 << board.laneBits) - 1
+        self.minRedCol = min((code & laneMask for code in codes), default=board.size)
+        self._sorted = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def distance(self, state):
+        if state[1] < self.minRedCol:
+            return None
+        entry = self.entries.get(self.board.pack(state))
+        return None if entry is None else entry[0]
+
+    def tail(self, state):
+        # Moves from a member state to the goal along stored shortest moves.
+        path = []
+        distance, code = self.entries[self.board.pack(state)]
+        while distance:
+            vid, delta = decodeMove(code)
+            path.append((vid, delta))
+            state = self.board.move(state, vid, delta)
+            distance, code = self.entries[self.board.pack(state)]
+        return path
+
+    def sortedArrays(self):
+        # Member codes as a sorted int64 array plus their distances, for
+        # numpy searches.
+        if self._sorted is None:
+            import numpy as np
+            codes = np.fromiter(self.entries, dtype=np.int64, count=len(self.entries))
+            codes.sort()
+            distances = np.array([self.entries[int(code)][0] for code in codes], dtype=np.int64)
+            self._sorted = (codes, distances)
+        return self._sorted
+
+
+def goalStates(board, start_state):
+    # Every placement with the target car at the exit, moving only the
+    # vehicles that are active (see Board.freezeIrrelevant); frozen
+    # vehicles keep their start positions. Enumerating them directly is
+    # far cheaper than walking the start's component to find its goals;
+    # goals in other components only add unreachable members.
+    n = board.size
+    budget = board.budget
+    active = set(board.activeVehicles)
+    choices = []
+    for vid, v in enumerate(board.vehicles):
+        if vid == 0:
+            positions = [n - v.length] if 0 in active else [board.lanePos(start_state, 0)]
+        elif vid in active:
+            positions = range(n - v.length + 1)
+        else:
+            positions = [board.lanePos(start_state, vid)]
+        options = []
+        for pos in positions:
+            cells = 0
+            for k in range(v.length):
+                cells |= 1 << (v.row * n + pos + k if v.isHorizontal else (pos + k) * n + v.col)
+            options.append((pos << (vid * board.laneBits), cells))
+        choices.append(options)
+
+    goals = []
+    stack = [(0, 0, 0)]
+    count = 0
+    while stack:
+        vid, code, occupied = stack.pop()
+        count += 1
+        if budget is not None and not count & CHECK_MASK:
+            budget.check(count, len(goals))
+        if vid == len(choices):
+            goals.append(code)
+            continue
+        for part, cells in choices[vid]:
+            if not occupied & cells:
+                stack.append((vid + 1, code | part, occupied | cells))
+    if budget is not None:
+        budget.charge(count)
+    goalPos = n - board.vehicles[0].length
+    mask = (1 << board.laneBits) - 1
+    return [code for code in goals if code & mask == goalPos]
+
+
+def buildPerimeter(board, start_state, bound, byCost=False):
+    # Backward search from all goal states. Slides are reversible, so it
+    # is an ordinary forward search (BFS, or Dijkstra on vehicle lengths)
+    # that stops at `bound`; the move back towards the goal is the inverse
+    # of the move that reached each state. Like Board.bfs and Board.ucs
+    # it skips successors that commute with the move just made. The work
+    # counts against board.budget.
+    budget = board.budget
+    found = {board.unpack(code): (0, 0) for code in goalStates(board, start_state)}
+    count = 0
+    if byCost:
+        frontier = [(0, state, NO_MOVE) for state in found]
+        done = set()
+        while frontier:
+            dist, state, lastMove = heapq.heappop(frontier)
+            if state in done:
+                continue
+            done.add(state)
+            count += 1
+            if budget is not None and not count & CHECK_MASK:
+                budget.check(count, len(found))
+            for next_state, (vid, delta) in board.iterSuccessors(state, lastMove):
+                nextDist = dist + board.vehicles[vid].length
+                if nextDist <= bound and nextDist < found.get(next_state, (bound + 1,))[0]:
+                    found[next_state] = (nextDist, encodeMove(vid, -delta))
+                    heapq.heappush(frontier, (nextDist, next_state, encodeMove(vid, delta)))
+    else:
+        frontier = deque((state, NO_MOVE) for state in found)
+        while frontier:
+            state, lastMove = frontier.popleft()
+            dist = found[state][0]
+            count += 1
+            if budget is not None and not count & CHECK_MASK:
+                budget.check(count, len(found))
+            if dist == bound:
+                continue
+            for next_state, (vid, delta) in board.iterSuccessors(state, lastMove):
+                if next_state not in found:
+                    found[next_state] = (dist + 1, encodeMove(vid, -delta))
+                    frontier.append((next_state, encodeMove(vid, delta)))
+    if budget is not None:
+        budget.charge(count)
+
+    states = list(found)
+    return Perimeter(board, bound, byCost, [board.pack(state) for state in states],
+                     [found[state][0] for state in states], [found[state][1] for state in states])
+
+
+def cacheKey(board, start_state, bound, byCost):
+    # One perimeter per level and set of frozen vehicles, whatever the
+    # start position of the active ones.
+    frozen = [(vid, board.lanePos(start_state, vid)) for vid in range(len(board.vehicles))
+              if vid not in board.activeVehicles]
+    description = repr((FORMAT_VERSION, board.size, board.vehicles, tuple(board.activeVehicles),
+                        frozen, bound, byCost))
+    return hashlib.sha1(description.encode()).hexdigest()[:16]
+
+
+def _save(path, perimeter):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    codes = array('q', perimeter.entries)
+    distances = array('H', (perimeter.entries[code][0] for code in codes))
+    moves = array('b', (perimeter.entries[code][1] for code in codes))
+    temp = path + ".tmp"
+    with open(temp, "wb") as file:
+        array('q', [len(codes)]).tofile(file)
+        codes.tofile(file)
+        distances.tofile(file)
+        moves.tofile(file)
+    os.replace(temp, path)
+
+
+def _evict(directory, limit=CACHE_BYTES):
+    # Removes the least recently used perimeter files until the rest fit
+    # in limit bytes. Loads touch their file, so use counts, not age.
+    files = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith(".bin"):
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+    total = 0
+    for _, size, path in sorted(files, reverse=True):
+        total += size
+        if total > limit:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _load(path, board, bound, byCost):
+    with open(path, "rb") as file:
+        count = array('q')
+        count.fromfile(file, 1)
+        codes, distances, moves = array('q'), array('H'), array('b')
+        codes.fromfile(file, count[0])
+        distances.fromfile(file, count[0])
+        moves.fromfile(file, count[0])
+    return Perimeter(board, bound, byCost, codes, distances, moves)
+
+
+def loadPerimeter(board, start_state, bound, byCost=False, directory=CACHE_DIRECTORY):
+    # Returns the perimeter for this level from memory, then from disk,
+    # and only builds (and saves) it when neither has it. A build that
+    # runs out of board.budget raises OutOfBudget and caches nothing.
+    key = cacheKey(board, start_state, bound, byCost)
+    perimeter = _loaded.get(key)
+    if perimeter is not None:
+        perimeter.board = board
+        return perimeter
+
+    path = os.path.join(directory, f"{key}.bin")
+    try:
+        perimeter = _load(path, board, bound, byCost)
+        os.utime(path)
+    except (OSError, EOFError):
+        perimeter = buildPerimeter(board, start_state, bound, byCost)
+        try:
+            _save(path, perimeter)
+            _evict(directory)
+        except OSError as e:
+            warnings.warn(f"could not cache the goal perimeter: {e}", RuntimeWarning)
+    _loaded[key] = perimeter
+    return perimeter
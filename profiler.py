@@ -0,0 +1,87 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def tag(name):
+    # Level and algorithm names as they can appear in a file name ("A*" -> "Astar").
+    return re.sub(r"[^\w]+", "-", name.replace("*", "star")).strip("-")
+
+
+def frameLabel(code):
+    return f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class SamplingProfiler:
+    # Statistical profiler for one thread (the one that creates it, unless
+    # another ident is given). A daemon thread grabs that thread's stack
+    # every `interval` seconds and counts it, so the profiled code runs
+    # uninstrumented; at the default 5 ms the cost stays around 1-2%.
+    # Samples are written in the collapsed-stack format read by
+    # flamegraph.pl, speedscope and inferno.
+    def __init__(self, interval=0.005, threadId=None):
+        self.interval = interval
+        self.threadId = threading.get_ident() if threadId is None else threadId
+        self.samples = Counter()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.threadId)
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            if codes:
+                codes.reverse()
+                with self.lock:
+                    self.samples[tuple(codes)] += 1
+
+    def takeSamples(self):
+        # Returns the samples collected so far and starts a fresh count.
+        with self.lock:
+            samples, self.samples = self.samples, Counter()
+        return samples
+
+    def write(self, directory, level, algorithm, samples=None):
+        # Writes <level>-<algorithm>-<timestamp>.folded into directory and
+        # returns its path, or None when nothing was sampled.
+        if samples is None:
+            samples = self.takeSamples()
+        if not samples:
+            return None
+        folded = Counter()
+        for codes, count in samples.items():
+            folded[";".join(frameLabel(code) for code in codes)] += count
+
+        os.makedirs(directory, exist_ok=True)
+        now = time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"-{int(now * 1000) % 1000:03d}"
+        path = os.path.join(directory, f"{tag(level)}-{tag(algorithm)}-{stamp}.folded")
+        with open(path, "w") as file:
+            for stack, count in folded.most_common():
+                file.write(f"{stack} {count}\n")
+        return path
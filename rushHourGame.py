@@ -1,34 +1,31 @@
 import pygame
 import number
 import time
+import assets
 import tracemalloc
 from vehicle import Vehicle, Board
+from levelPack import LevelPack, loadLevelFile, initialState
+from solver import solve, optimalityGap, ALGORITHM_NAMES, COSTED
 from gameModels import GameState, Algorithm
 from ui import Button, Dropdown
 from colors import Colors
-
-background = pygame.image.load("Resource/starBG.jpeg")
-background = pygame.transform.scale(background, (number.WINDOWWIDTH, number.WINDOWHEIGHT))
-
-pygame.init()
+from profiler import SamplingProfiler
+from budget import Budget, Exhausted
+from autoSelect import levelFeatures
 
 class RushHourGame:
     def __init__(self):
         self.screenWidth = number.WINDOWWIDTH
         self.screenHeight = number.WINDOWHEIGHT
-        self.screen = pygame.display.set_mode((self.screenWidth, self.screenHeight))
-        
-        pygame.display.set_caption("Rush Hour Solver")
-        icon = pygame.image.load("Resource/icon.png")
-        pygame.display.set_icon(icon)
+        self.screen = assets.display()
         
         self.running = True
         self.gameState = GameState.STOPPED
         
-        self.titleFont = pygame.font.Font(None, 48)
-        self.buttonFont = pygame.font.Font(None, 36)
-        self.mediumFont = pygame.font.Font(None, 32)
-        self.smallFont = pygame.font.Font(None, 24)
+        self.titleFont = assets.font(48)
+        self.buttonFont = assets.font(36)
+        self.mediumFont = assets.font(32)
+        self.smallFont = assets.font(24)
         
         self.gridSize = 6
         self.cellSize = 90
@@ -39,10 +36,20 @@ class RushHourGame:
         self.vehicles = []
         self.board = None
         self.initialState = None
-        self.currentAlgorithm = Algorithm.BFS
-        self.currentMap = "level1.txt"
-        self.availableMaps = ["level1.txt", "level2.txt", "level3.txt", "level4.txt", "level5.txt",
-                              "level6.txt","level7.txt","level8.txt","level9.txt","level10.txt", "level11.txt", "level12.txt"]
+        self.currentAlgorithm = Algorithm.AUTO
+        self.levelPack = LevelPack.openIfExists("Map/levels.pack")
+        if self.levelPack and len(self.levelPack):
+            self.availableMaps = self.levelPack.names()
+        else:
+            self.availableMaps = ["level1.txt", "level2.txt", "level3.txt", "level4.txt", "level5.txt",
+                                  "level6.txt","level7.txt","level8.txt","level9.txt","level10.txt", "level11.txt", "level12.txt"]
+        self.currentMap = self.availableMaps[0]
+        self.levelInfo = None
+        self.levelFeatures = None
+        # What Auto optimises ("moves", "cost" or "any") and, after it ran,
+        # the (algorithm, heuristic, reason) it picked.
+        self.autoCriterion = "moves"
+        self.autoChoice = None
         
         self.animationSpeed = 1.5
         self.solutionPath = []
@@ -54,6 +61,21 @@ class RushHourGame:
         self.peakMemoryKb = 0.0
         self.solutionMoves = []
         self.totalCost = 0
+        self.solutionBound = None
+        self.anytimeTimeLimit = 2.0
+        # Goal-side perimeter depth (see perimeter.py); 0 turns it off.
+        self.perimeterDepth = 0
+        # Searches run on the UI thread, so none may hold it longer than this.
+        self.searchSeconds = 60.0
+        # Learned distances (see learnedHeuristic.py); off because they let a
+        # repeat A* solve finish after a node or two, which would make the
+        # panel's nodes and time meaningless.
+        self.learnDistances = False
+        
+        # Toggled with P; samples the search and the render loop and writes
+        # one .folded file per run into profileDirectory.
+        self.profiler = None
+        self.profileDirectory = "profiles"
         
         self.loadAssets()
         
@@ -93,20 +115,12 @@ class RushHourGame:
         self.gridY = self.gridCardY + self.gridPadding + 50
     
     def loadAssets(self):
-        self.resetIcon = pygame.image.load("Resource/reset.png")
-        self.resetIcon = pygame.transform.scale(self.resetIcon, (20, 20))
-        
-        self.carImages = []
-        for i in range(1, 9):
-            image = pygame.image.load(f"Resource/car{i}.png")
-            self.carImages.append(image)
-                
-        self.truckImages = []
-        for i in range(1, 8):
-            image = pygame.image.load(f"Resource/truck{i}.png")
-            self.truckImages.append(image)
-        
-        self.targetCarImage = pygame.image.load("Resource/target.png")
+        # Vehicle sprites are kept as paths; assets.image loads each one on
+        # first use and caches it at the size and rotation it is drawn with.
+        self.resetIcon = assets.image("Resource/reset.png", (20, 20), alpha=True)
+        self.carImages = [f"Resource/car{i}.png" for i in range(1, 9)]
+        self.truckImages = [f"Resource/truck{i}.png" for i in range(1, 8)]
+        self.targetCarImage = "Resource/target.png"
         
     def setupUI(self):
         controlCardX = self.leftColumnX
@@ -170,29 +184,40 @@ class RushHourGame:
         
         self.dropdowns = [self.algorithmDropdown, self.mapDropdown]
     
+    def toggleProfiling(self):
+        if self.profiler is None:
+            self.profiler = SamplingProfiler().start()
+            print("Profiling on")
+        else:
+            self.writeProfile("render")
+            self.profiler.stop()
+            self.profiler = None
+            print("Profiling off")
+    
+    def writeProfile(self, algorithmTag):
+        # Flushes what was sampled since the last write, tagged with the level.
+        if self.profiler is None:
+            return
+        path = self.profiler.write(self.profileDirectory, self.currentMap.replace(".txt", ""), algorithmTag)
+        if path:
+            print(f"Profile written to {path}")
+    
     def backToMenu(self):
         number.currentScreen = 0
     
     def loadMap(self, filename):
-        self.vehicles = []
-        
-        with open(f"Map/{filename}", 'r') as file:
-            lines = file.readlines()
-            
-        carId = 0
-        for line in lines:
-            line = line.strip()
-            if line:
-                parts = line.split()
-                if len(parts) == 4:
-                    x, y, size, orientation = int(parts[0]), int(parts[1]), int(parts[2]), parts[3]
-                    self.vehicles.append(Vehicle(carId, x, y, size, orientation == 'H'))
-                    carId += 1
-            
-        
+        index = self.levelPack.indexOf(filename) if self.levelPack else None
+        if index is not None:
+            self.vehicles = self.levelPack.vehicles(index)
+            self.levelInfo = self.levelPack.info(index)
+        else:
+            self.vehicles = loadLevelFile(f"Map/{filename}")
+            self.levelInfo = None
         
         self.board = Board(self.vehicles)
-        self.initialState = tuple([coord for v in self.vehicles for coord in (v.row, v.col)])
+        self.initialState = initialState(self.vehicles)
+        # Computed on the first Auto solve of the level, see runAlgorithm.
+        self.levelFeatures = None
         
         self.originalPositions = [(vehicle.row, vehicle.col) for vehicle in self.vehicles]
     
@@ -207,41 +232,53 @@ class RushHourGame:
             print("No board or initial state available")
             return
         
-        algorithm_names = {
-            Algorithm.A_STAR: "A*",
-            Algorithm.BFS: "BFS",
-            Algorithm.IDS: "IDS (Iterative Deepening Search)",
-            Algorithm.UCS: "UCS (Uniform-Cost Search)"
-        }
-        
-        algo_name = algorithm_names.get(algorithm, "Unknown")
+        algo_name = ALGORITHM_NAMES.get(algorithm, "Unknown")
         print(f"Running {algo_name} algorithm...")
         self.gameState = GameState.PLAYING
+        self.writeProfile("render")
         
         tracemalloc.start()
         startCurrent, startPeak = tracemalloc.get_traced_memory()
         startTime = time.time()
         
         try:
-            if algorithm == Algorithm.A_STAR:
-                result = self.board.aStar(self.initialState)
-            elif algorithm == Algorithm.BFS:
-                result = self.board.bfs(self.initialState)
-            elif algorithm == Algorithm.IDS:
-                result = self.board.ids(self.initialState, max_depth=100)
-            elif algorithm == Algorithm.UCS:
-                result = self.board.ucs(self.initialState)
-            else:
-                result = self.board.aStar(self.initialState)
+            if algorithm == Algorithm.AUTO and self.levelFeatures is None:
+                self.levelFeatures = levelFeatures(self.board, self.initialState,
+                                                   self.levelInfo.reachableStates if self.levelInfo else None)
+            result = solve(self.board, self.initialState, algorithm,
+                           timeLimit=self.anytimeTimeLimit, onSolution=self.reportImprovement,
+                           perimeterDepth=self.perimeterDepth, budget=Budget(seconds=self.searchSeconds),
+                           criterion=self.autoCriterion, features=self.levelFeatures, learn=self.learnDistances)
+            self.autoChoice = self.board.autoChoice if algorithm == Algorithm.AUTO else None
+            if self.autoChoice is not None:
+                print(f"Auto chose {self.autoChoice[0].value}: {self.autoChoice[2]}")
+                algorithm = self.autoChoice[0]
+                algo_name = f"Auto: {ALGORITHM_NAMES.get(algorithm, algorithm.value)}"
             
             endTime = time.time()
             endCurrent, endPeak = tracemalloc.get_traced_memory()
             tracemalloc.stop()
+            self.writeProfile(algorithm.value)
             
             self.searchTime = endTime - startTime
             self.nodesExpanded = self.board.nodesExpanded
             self.peakMemoryKb = (endPeak - startCurrent) / 1024
+            self.solutionBound = self.board.suboptimalityBound if algorithm == Algorithm.ANYTIME_A_STAR else None
+            
+            frozen = len(self.vehicles) - len(self.board.activeVehicles)
+            if frozen:
+                print(f"Froze {frozen} vehicles that cannot affect the target car")
             
+            if isinstance(result, Exhausted):
+                print(f"{algo_name} stopped: {result.reason} budget exhausted after "
+                      f"{result.nodesExpanded} nodes")
+                self.nodesExpanded = result.nodesExpanded
+                self.solutionPath = [f"{algo_name} gave up after {result.elapsed:.0f}s ({result.reason} budget)"]
+                self.solutionMoves = []
+                self.totalCost = 0
+                self.gameState = GameState.FINISHED
+                return
+
             if result is None:
                 error_msg = "No solution found within depth limit!" if algorithm == Algorithm.IDS else "No solution found!"
                 print(error_msg)
@@ -251,16 +288,15 @@ class RushHourGame:
                 self.gameState = GameState.FINISHED
                 return
             
-            if algorithm in [Algorithm.A_STAR, Algorithm.UCS]:
-                moves, self.totalCost = result
-            else:
-                moves = result
-                self.totalCost = sum(self.vehicles[vid].length for vid, _ in moves)
+            moves, self.totalCost = result
             
             print(f"{algo_name} Solution found in {self.searchTime:.3f}s with {len(moves)} moves")
             print(f"Total cost: {self.totalCost}")
             print(f"Nodes expanded: {self.nodesExpanded}")
             print(f"Peak memory usage: {self.peakMemoryKb:.2f} KB")
+            if algorithm == Algorithm.PARALLEL_A_STAR:
+                for stats in self.board.workerStats:
+                    print(f"  Worker {stats['worker']}: {stats['expanded']} nodes, {stats['nodesPerSecond']:.0f} nodes/s")
             
             self.solutionMoves = moves
             self.solutionPath = []
@@ -288,6 +324,9 @@ class RushHourGame:
             self.totalCost = 0
             self.gameState = GameState.FINISHED
 
+    def reportImprovement(self, moves, cost, bound):
+        print(f"Improved solution: {len(moves)} moves, cost {cost}, within {bound:.3f}x of optimal")
+
     def pauseGame(self):
         if self.gameState == GameState.PLAYING:
             self.gameState = GameState.PAUSED
@@ -301,6 +340,7 @@ class RushHourGame:
         self.nodesExpanded = 0
         self.peakMemoryKb = 0.0
         self.totalCost = 0
+        self.autoChoice = None
         
         if hasattr(self, 'originalPositions'):
             for i, (origRow, origCol) in enumerate(self.originalPositions):
@@ -429,10 +469,9 @@ class RushHourGame:
             
             if carImage:
                 if vehicle.isHorizontal:
-                    scaledImage = pygame.transform.scale(carImage, (height, width))
-                    scaledImage = pygame.transform.rotate(scaledImage, -90)
+                    scaledImage = assets.image(carImage, (height, width), alpha=True, angle=-90)
                 else:
-                    scaledImage = pygame.transform.scale(carImage, (width, height))
+                    scaledImage = assets.image(carImage, (width, height), alpha=True)
                 
                 self.screen.blit(scaledImage, carRect)
             else:
@@ -446,11 +485,15 @@ class RushHourGame:
                     self.screen.blit(text, textRect)
 
     def drawUI(self):
-        self.screen.blit(background, (0, 0))
+        self.screen.blit(assets.image("Resource/starBG.jpeg", (self.screenWidth, self.screenHeight)), (0, 0))
         headerText = self.titleFont.render("Rush Hour Solver", True, Colors.WHITE)
         headerRect = headerText.get_rect(center=(self.screenWidth // 2, 40))
         self.screen.blit(headerText, headerRect)
         
+        if self.profiler is not None:
+            profilingText = self.smallFont.render("Profiling (P to stop)", True, Colors.ACCENT_RED)
+            self.screen.blit(profilingText, profilingText.get_rect(right=self.screenWidth - 20, centery=40))
+        
         controlCard = pygame.Rect(
             self.leftColumnX, self.leftColumnY,
             self.controlCardWidth, self.controlCardHeight
@@ -480,10 +523,16 @@ class RushHourGame:
         metricsContentY = metricsCard.top + 70
         metricsContentX = metricsCard.left + 20
         
+        # With Auto, the engine it picked and why.
+        usedAlgorithm = self.autoChoice[0] if self.autoChoice else self.currentAlgorithm
+        algorithmLabel = f"Algorithm: {self.currentAlgorithm.value}"
+        if self.autoChoice:
+            algorithmLabel += f" -> {usedAlgorithm.value}"
+        
         if self.gameState == GameState.FINISHED and hasattr(self, 'searchTime'):
             if self.searchTime > 0 and hasattr(self, 'solutionMoves') and self.solutionMoves:
                 metricsData = [
-                    f"Algorithm: {self.currentAlgorithm.value}",
+                    algorithmLabel,
                     f"Search Time: {self.searchTime:.3f}s",
                     f"Nodes Expanded: {self.nodesExpanded}",
                     f"Peak Memory: {self.peakMemoryKb:.2f} KB"
@@ -491,8 +540,18 @@ class RushHourGame:
                 
                 metricsData.append(f"Solution Length: {len(self.solutionMoves)} moves")
                     
-                if hasattr(self, 'totalCost') and self.currentAlgorithm in [Algorithm.UCS, Algorithm.A_STAR]:
+                if hasattr(self, 'totalCost') and usedAlgorithm in COSTED:
                     metricsData.append(f"Total Cost: {self.totalCost}")
+                
+                if self.solutionBound is not None:
+                    metricsData.append(f"Within {self.solutionBound:.2f}x of optimal")
+                
+                gap = optimalityGap(self.solutionMoves, self.levelInfo)
+                if gap:
+                    metricsData.append(f"Optimal: {self.levelInfo.optimalMoves} moves (+{gap})")
+                
+                if self.autoChoice:
+                    metricsData.append(f"Why: {self.autoChoice[2]}")
                     
                 for i, metric in enumerate(metricsData):
                     metricSurface = self.mediumFont.render(metric, True, Colors.WHITE)
@@ -515,11 +574,13 @@ class RushHourGame:
                 self.screen.blit(noSolutionText, noSolutionRect)
                 
                 metricsData = [
-                    f"Algorithm: {self.currentAlgorithm.value}",
+                    algorithmLabel,
                     f"Search Time: {self.searchTime:.3f}s",
                     f"Nodes Expanded: {self.nodesExpanded}",
                     f"Peak Memory: {self.peakMemoryKb:.2f} KB"
                 ]
+                if self.autoChoice:
+                    metricsData.append(f"Why: {self.autoChoice[2]}")
                 
                 for i, metric in enumerate(metricsData):
                     metricSurface = self.smallFont.render(metric, True, Colors.WHITE)
@@ -605,6 +666,8 @@ class RushHourGame:
                 if event.key == pygame.K_ESCAPE:
                     number.currentScreen = 0
                     return False
+                if event.key == pygame.K_p:
+                    self.toggleProfiling()
         
         return True
     
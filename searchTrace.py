@@ -0,0 +1,277 @@
+import argparse
+import struct
+import sys
+from array import array
+from collections import Counter
+
+from vehicle import Vehicle, Board
+from levelPack import goalDistances
+from stateTable import NO_VALUE
+
+# Trace layout:
+#   header : magic, version, board size, vehicle count, algorithm name
+#            length, then 4 bytes per vehicle (row, col, length, flags)
+#            and the utf-8 algorithm name
+#   chunks : a record count n, then n packed states (int64), n g-values,
+#            n h-values and n depths (int32; a DFS path can be far deeper
+#            than int16 holds) and n codes of the move into the state
+#            (int8), each column in native byte order
+# One record per expansion, in expansion order. NO_VALUE marks a column
+# the search does not know (h for blind searches, depth for UCS).
+MAGIC = b"RHTR"
+VERSION = 2
+HEADER = struct.Struct("<4sHBBH")
+VEHICLE = struct.Struct("<BBBB")
+COUNT = struct.Struct("<I")
+
+FLAG_HORIZONTAL = 1
+CHUNK_RECORDS = 1 << 16
+
+
+class TraceRecorder:
+    # Opt-in expansion log. solve() hands it to the search as board.trace;
+    # searches call record() once per expanded state (layer searches call
+    # recordLayer() once per layer). Records are buffered in typed arrays
+    # and written a chunk at a time, so a trace costs about 21 bytes per
+    # expansion on disk and a few appends per expansion in the search.
+    def __init__(self, path, chunkRecords=CHUNK_RECORDS):
+        self.path = path
+        self.chunkRecords = chunkRecords
+        self.file = None
+        self.board = None
+        self.records = 0
+        self._clear()
+
+    def _clear(self):
+        self.codes = array('q')
+        self.g = array('i')
+        self.h = array('i')
+        self.depth = array('i')
+        self.moves = array('b')
+
+    def begin(self, board, algorithm):
+        self.board = board
+        name = algorithm.encode()
+        self.file = open(self.path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, board.size, len(board.vehicles), len(name)))
+        for v in board.vehicles:
+            self.file.write(VEHICLE.pack(v.row, v.col, v.length, FLAG_HORIZONTAL if v.isHorizontal else 0))
+        self.file.write(name)
+        return self
+
+    def record(self, code, g, h, depth, move):
+        self.codes.append(code)
+        self.g.append(g)
+        self.h.append(h)
+        self.depth.append(depth)
+        self.moves.append(move)
+        if len(self.codes) >= self.chunkRecords:
+            self.flush()
+
+    def recordLayer(self, codes, depth, moves=None):
+        # A whole BFS layer of packed states (a numpy array) at one depth;
+        # moves holds the code of the move into each, None for the start.
+        import numpy as np
+        self.flush()
+        count = len(codes)
+        self.file.write(COUNT.pack(count))
+        self.file.write(codes.astype(np.int64).tobytes())
+        self.file.write(np.full(count, depth, dtype=np.int32).tobytes())
+        self.file.write(np.full(count, NO_VALUE, dtype=np.int32).tobytes())
+        self.file.write(np.full(count, depth, dtype=np.int32).tobytes())
+        if moves is None:
+            moves = np.full(count, NO_VALUE, dtype=np.int8)
+        self.file.write(moves.astype(np.int8).tobytes())
+        self.records += count
+
+    def flush(self):
+        if not self.codes:
+            return
+        self.file.write(COUNT.pack(len(self.codes)))
+        for column in (self.codes, self.g, self.h, self.depth, self.moves):
+            column.tofile(self.file)
+        self.records += len(self.codes)
+        self._clear()
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SearchTrace:
+    # A trace read back into memory: the level (size, vehicles), the
+    # algorithm name and one array per column.
+    def __init__(self, size, vehicles, algorithm, codes, g, h, depth, moves):
+        self.size = size
+        self.vehicles = vehicles
+        self.algorithm = algorithm
+        self.codes = codes
+        self.g = g
+        self.h = h
+        self.depth = depth
+        self.moves = moves
+
+    def __len__(self):
+        return len(self.codes)
+
+    def board(self):
+        return Board(self.vehicles, self.size)
+
+
+def readTrace(path):
+    with open(path, "rb") as file:
+        magic, version, size, vehicleCount, nameLength = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} search trace")
+        vehicles = []
+        for vid in range(vehicleCount):
+            row, col, length, flags = VEHICLE.unpack(file.read(VEHICLE.size))
+            vehicles.append(Vehicle(vid, row, col, length, bool(flags & FLAG_HORIZONTAL)))
+        algorithm = file.read(nameLength).decode()
+
+        columns = [array('q'), array('i'), array('i'), array('i'), array('b')]
+        while True:
+            head = file.read(COUNT.size)
+            if len(head) < COUNT.size:
+                break
+            count = COUNT.unpack(head)[0]
+            for column in columns:
+                column.fromfile(file, count)
+    return SearchTrace(size, vehicles, algorithm, *columns)
+
+
+def exactDistances(trace):
+    # Optimal moves to the goal for every state reachable from the first
+    # expanded one, by a BFS back from the goals. Offline only: it walks
+    # the level's whole state space.
+    board = trace.board()
+    distances = goalDistances(board, board.unpack(trace.codes[0]))
+    return {board.pack(state): distance for state, distance in distances.items()}
+
+
+def summarise(trace, distances=None, slices=10):
+    # Expansion counts, how often states were expanded again, how the h
+    # values compare with exact distances (when given), and the frontier
+    # over time: for each of `slices` equal runs of expansions, the range
+    # of depths and g-values reached and the share of states expanded for
+    # the first time.
+    seen = set()
+    fresh = []
+    for code in trace.codes:
+        fresh.append(code not in seen)
+        seen.add(code)
+    expansions = len(trace)
+    summary = {
+        "algorithm": trace.algorithm,
+        "expansions": expansions,
+        "uniqueStates": len(seen),
+        "reexpansionRate": 1 - len(seen) / expansions if expansions else 0.0,
+        "perDepth": sorted(Counter(d for d in trace.depth if d != NO_VALUE).items()),
+    }
+
+    if distances is not None:
+        pairs = [(h, distances[code]) for code, h in zip(trace.codes, trace.h)
+                 if h != NO_VALUE and code in distances]
+        if pairs:
+            solved = [(h, exact) for h, exact in pairs if exact]
+            summary["heuristic"] = {
+                "states": len(pairs),
+                "exact": sum(h == exact for h, exact in pairs) / len(pairs),
+                "overestimates": sum(h > exact for h, exact in pairs),
+                "meanError": sum(exact - h for h, exact in pairs) / len(pairs),
+                "meanRatio": sum(h / exact for h, exact in solved) / len(solved) if solved else 1.0,
+            }
+
+    timeline = []
+    step = max(1, -(-expansions // slices))
+    for begin in range(0, expansions, step):
+        end = min(begin + step, expansions)
+        depths = [d for d in trace.depth[begin:end] if d != NO_VALUE]
+        g = [value for value in trace.g[begin:end] if value != NO_VALUE]
+        timeline.append({
+            "expansions": (begin, end),
+            "depth": (min(depths), max(depths)) if depths else None,
+            "g": (min(g), max(g)) if g else None,
+            "new": sum(fresh[begin:end]) / (end - begin),
+        })
+    summary["timeline"] = timeline
+    return summary
+
+
+def compareTraces(first, second):
+    # Two traces of the same level: how many states each expanded and how
+    # much of that work they share.
+    if first.size != second.size or first.vehicles != second.vehicles:
+        raise ValueError("the traces are of different levels")
+    a, b = set(first.codes), set(second.codes)
+    return {
+        "algorithms": (first.algorithm, second.algorithm),
+        "expansions": (len(first), len(second)),
+        "uniqueStates": (len(a), len(b)),
+        "common": len(a & b),
+        "onlyFirst": len(a - b),
+        "onlySecond": len(b - a),
+        "overlap": len(a & b) / len(a | b) if a | b else 1.0,
+    }
+
+
+def printSummary(summary):
+    print(f"{summary['algorithm']}: {summary['expansions']} expansions of {summary['uniqueStates']} states "
+          f"({summary['reexpansionRate']:.1%} re-expansions)")
+    heuristic = summary.get("heuristic")
+    if heuristic:
+        print(f"  h on {heuristic['states']} states: {heuristic['exact']:.1%} exact, "
+              f"{heuristic['overestimates']} overestimates, mean error {heuristic['meanError']:.2f}, "
+              f"mean h/h* {heuristic['meanRatio']:.3f}")
+    if summary["perDepth"]:
+        print("  expansions per depth: " + ", ".join(f"{d}:{n}" for d, n in summary["perDepth"]))
+    for part in summary["timeline"]:
+        begin, end = part["expansions"]
+        depth = "-" if part["depth"] is None else "{}-{}".format(*part["depth"])
+        g = "-" if part["g"] is None else "{}-{}".format(*part["g"])
+        print(f"  {begin:>9}-{end:<9} depth {depth:>7}  g {g:>7}  new {part['new']:.1%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse search traces written by solver.py --trace.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    summary = commands.add_parser("summary", help="re-expansions, heuristic accuracy and frontier of a trace")
+    summary.add_argument("trace")
+    summary.add_argument("--no-exact", action="store_true",
+                         help="skip the exact distances (and the heuristic accuracy) on large levels")
+    summary.add_argument("--slices", type=int, default=10, help="rows in the frontier timeline")
+    compare = commands.add_parser("compare", help="the expanded states two traces of one level share")
+    compare.add_argument("first")
+    compare.add_argument("second")
+    args = parser.parse_args(argv)
+
+    if args.command == "summary":
+        trace = readTrace(args.trace)
+        if not len(trace):
+            print("The trace is empty")
+            return 1
+        printSummary(summarise(trace, None if args.no_exact else exactDistances(trace), args.slices))
+        return 0
+
+    try:
+        result = compareTraces(readTrace(args.first), readTrace(args.second))
+    except ValueError as e:
+        print(e)
+        return 1
+    for name, expansions, unique in zip(result["algorithms"], result["expansions"], result["uniqueStates"]):
+        print(f"{name}: {expansions} expansions of {unique} states")
+    print(f"{result['common']} states expanded by both, {result['onlyFirst']} only by the first, "
+          f"{result['onlySecond']} only by the second ({result['overlap']:.1%} overlap)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
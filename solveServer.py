@@ -0,0 +1,239 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from vehicle import Board
+from levelPack import parseLevel, initialState, validateLevel
+from solver import solve, algorithmByValue, ALGORITHM_NAMES
+from gameModels import Algorithm
+from profiler import SamplingProfiler
+from budget import Budget, Exhausted
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_SECONDS = 30.0
+DEFAULT_MAX_MEMORY_MB = 1024
+
+# Set in each worker by warmWorker: the --profile directory, the
+# (seconds, nodes, bytes) budget every solve runs under, and --learn.
+profileDirectory = None
+solveLimits = (None, None, None)
+learnDistances = False
+
+
+def warmWorker(profileDir=None, limits=(None, None, None), learn=False):
+    # Runs once in every pool process so the first real request does not
+    # pay for imports (numpy for the layer BFS) and first-call setup.
+    global profileDirectory, solveLimits, learnDistances
+    profileDirectory = profileDir
+    solveLimits = limits
+    learnDistances = learn
+    vehicles = parseLevel(["2 0 2 H", "0 2 2 V"])
+    solve(Board(vehicles), initialState(vehicles), algorithmByValue("BFS"))
+
+
+def solveLayout(layout, algorithm, timeLimit=None, compact=False):
+    # Worker entry point. layout is the level file text (or its lines);
+    # the result is plain JSON-ready data.
+    lines = layout.splitlines() if isinstance(layout, str) else layout
+    vehicles = validateLevel(lines)
+    alg = algorithmByValue(algorithm)
+    board = Board(vehicles, compactTables=compact)
+
+    budget = Budget(*solveLimits) if any(limit is not None for limit in solveLimits) else None
+    profiler = SamplingProfiler().start() if profileDirectory else None
+    startTime = time.time()
+    result = solve(board, initialState(vehicles), alg, timeLimit, budget=budget, learn=learnDistances)
+    elapsed = time.time() - startTime
+    if profiler is not None:
+        profiler.stop()
+        level = "layout-" + hashlib.sha1("\n".join(lines).encode()).hexdigest()[:8]
+        profiler.write(profileDirectory, level, alg.value)
+
+    exhausted = isinstance(result, Exhausted)
+    reply = {
+        "algorithm": ALGORITHM_NAMES.get(alg, alg.value),
+        "solved": result is not None and not exhausted,
+        "nodesExpanded": result.nodesExpanded if exhausted else board.nodesExpanded,
+        "elapsed": elapsed,
+        "frozenVehicles": len(vehicles) - len(board.activeVehicles),
+    }
+    if alg == Algorithm.AUTO:
+        reply["chosen"], _, reply["reason"] = board.autoChoice
+        reply["chosen"] = reply["chosen"].value
+    if exhausted:
+        reply["exhausted"] = result.reason
+        reply["statesStored"] = result.statesStored
+    elif result is not None:
+        moves, cost = result
+        reply["moves"] = [[vid, delta] for vid, delta in moves]
+        reply["cost"] = cost
+    return reply
+
+
+def canonicalLayout(layout):
+    # Vehicle ids are only the order of lines in the file, so layouts that
+    # differ just in that order are the same puzzle. The canonical form keeps
+    # the target car first and sorts the rest by position; order maps each
+    # canonical id back to the id used in this layout. Layouts are
+    # validated here, before anything is queued.
+    lines = layout.splitlines() if isinstance(layout, str) else layout
+    if not isinstance(lines, list) or not all(isinstance(line, str) for line in lines):
+        raise ValueError("layout must be a string or a list of lines")
+    vehicles = validateLevel(lines)
+    order = [0] + sorted(range(1, len(vehicles)),
+                         key=lambda vid: (vehicles[vid].row, vehicles[vid].col))
+    canonical = "\n".join(
+        f"{v.row} {v.col} {v.length} {'H' if v.isHorizontal else 'V'}"
+        for v in (vehicles[vid] for vid in order))
+    return canonical, order
+
+
+class SolveFrontEnd:
+    # asyncio front end over the worker pool. Identical requests (same
+    # canonical layout and options) that arrive while one is being solved
+    # wait on that solve instead of starting another. Every distinct solve
+    # is its own pool task, so a quick one never queues behind a hard one
+    # while another worker is idle.
+    def __init__(self, pool):
+        self.pool = pool
+        self.inFlight = {}
+        self.requests = 0
+        self.solves = 0
+
+    async def solve(self, layout, algorithm="A*", timeLimit=None, compact=False):
+        canonical, order = canonicalLayout(layout)
+        key = (canonical, algorithmByValue(algorithm).value, timeLimit, compact)
+        self.requests += 1
+
+        future = self.inFlight.get(key)
+        if future is None:
+            future = self.inFlight[key] = asyncio.wrap_future(self.pool.submit(solveLayout, *key))
+            future.add_done_callback(lambda _, key=key: self.inFlight.pop(key))
+            self.solves += 1
+
+        reply = dict(await asyncio.shield(future))
+        if "moves" in reply:
+            reply["moves"] = [[order[vid], delta] for vid, delta in reply["moves"]]
+        return reply
+
+
+class SolveHandler(BaseHTTPRequestHandler):
+    # POST /solve with {"layout": ..., "algorithm": ..., "timeLimit": ...,
+    # "compact": ...}; GET /health reports the pool size.
+    def do_GET(self):
+        if self.path == "/health":
+            frontEnd = self.server.frontEnd
+            self.reply(200, {"workers": self.server.workers,
+                             "requests": frontEnd.requests, "solves": frontEnd.solves})
+        else:
+            self.reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/solve":
+            self.reply(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            call = self.server.frontEnd.solve(
+                request["layout"], request.get("algorithm", "A*"),
+                request.get("timeLimit"), bool(request.get("compact", False)))
+        except (ValueError, KeyError, TypeError) as e:
+            self.reply(400, {"error": f"bad request: {e}"})
+            return
+        try:
+            self.reply(200, asyncio.run_coroutine_threadsafe(call, self.server.loop).result())
+        except (ValueError, argparse.ArgumentTypeError) as e:
+            self.reply(400, {"error": str(e)})
+        except Exception as e:
+            self.reply(500, {"error": f"solver failed: {e}"})
+
+    def reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class SolveServer(ThreadingHTTPServer):
+    # Each connection gets a thread that hands its request to the
+    # SolveFrontEnd running on a background event loop and blocks on the
+    # result. The solver processes are started and warmed before serving.
+    request_queue_size = 128
+
+    def __init__(self, address, workers=None, verbose=False, profileDir=None,
+                 limits=(None, None, None), learn=False):
+        super().__init__(address, SolveHandler)
+        self.workers = workers or os.cpu_count() or 1
+        self.verbose = verbose
+        self.pool = ProcessPoolExecutor(self.workers, initializer=warmWorker, initargs=(profileDir, limits, learn))
+        for future in [self.pool.submit(time.sleep, 0) for _ in range(self.workers)]:
+            future.result()
+        self.frontEnd = SolveFrontEnd(self.pool)
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    def server_close(self):
+        super().server_close()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.pool.shutdown(cancel_futures=True)
+
+
+def solveRemote(layout, algorithm="A*", timeLimit=None, compact=False,
+                host="127.0.0.1", port=DEFAULT_PORT, timeout=None):
+    # Client helper for other tools; returns the server's reply as a dict.
+    body = json.dumps({"layout": layout, "algorithm": algorithm,
+                       "timeLimit": timeLimit, "compact": compact}).encode()
+    request = urllib.request.Request(f"http://{host}:{port}/solve", data=body,
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Rush Hour solves over local HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="solver processes (default: one per CPU)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every request")
+    parser.add_argument("--profile", metavar="DIR", default=None,
+                        help="write a collapsed-stack flamegraph file to DIR for every solve")
+    parser.add_argument("--max-seconds", type=float, default=DEFAULT_MAX_SECONDS,
+                        help=f"stop any solve after this many seconds (default {DEFAULT_MAX_SECONDS:g})")
+    parser.add_argument("--max-nodes", type=int, default=None, help="stop any solve after this many nodes")
+    parser.add_argument("--max-memory", type=float, default=DEFAULT_MAX_MEMORY_MB, metavar="MB",
+                        help=f"stop any solve whose tables reach this estimate (default {DEFAULT_MAX_MEMORY_MB})")
+    parser.add_argument("--learn", action="store_true",
+                        help="share learned distance tables between solves of the same level")
+    args = parser.parse_args(argv)
+
+    limits = (args.max_seconds, args.max_nodes, int(args.max_memory * 1024 * 1024))
+    server = SolveServer((args.host, args.port), args.workers, args.verbose, profileDir=args.profile,
+                         limits=limits, learn=args.learn)
+    print(f"Solving on http://{args.host}:{server.server_port}/solve with {server.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
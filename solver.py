@@ -0,0 +1,266 @@
+import argparse
+import os
+import signal
+import sys
+import time
+
+from vehicle import Board
+from gameModels import Algorithm
+from levelPack import LevelPack, loadLevelFile, initialState, NO_SOLUTION
+from vectorBfs import layeredBfs, frontierBfs, canVectorize
+from parallelAStar import parallelAStar
+from parallelBfs import parallelBfs
+from profiler import SamplingProfiler
+from heuristics import HEURISTICS
+from perimeter import loadPerimeter
+from budget import Budget, CancelToken, Exhausted, OutOfBudget
+from levelCompiler import specialise, generic
+from autoSelect import CRITERIA, chooseAlgorithm, levelFeatures
+from searchTrace import TraceRecorder
+from learnedHeuristic import loadLearned, saveLearned
+
+ALGORITHM_NAMES = {
+    Algorithm.AUTO: "Auto (picked from level features)",
+    Algorithm.A_STAR: "A*",
+    Algorithm.PARALLEL_A_STAR: "Parallel A* (hash-distributed)",
+    Algorithm.BFS: "BFS",
+    Algorithm.PARALLEL_BFS: "Parallel BFS (shared-memory layers)",
+    Algorithm.FRONTIER_BFS: "Frontier BFS (no closed list)",
+    Algorithm.IDS: "IDS (Iterative Deepening Search)",
+    Algorithm.DFS: "DFS (Depth-First Search)",
+    Algorithm.UCS: "UCS (Uniform-Cost Search)",
+    Algorithm.ANYTIME_A_STAR: "Anytime A* (ARA*)",
+    Algorithm.BEAM: "Beam Search",
+    Algorithm.GREEDY: "Greedy Best-First Search",
+}
+
+# Searches that stop at a goal-side perimeter when one is requested, and
+# the perimeter kind each uses (cost-based for UCS).
+PERIMETER_MOVES = [Algorithm.BFS, Algorithm.PARALLEL_BFS, Algorithm.FRONTIER_BFS, Algorithm.IDS, Algorithm.A_STAR]
+PERIMETER_COST = [Algorithm.UCS]
+
+# Searches that use and extend the learned distance tables (see
+# learnedHeuristic.py): A* learns inside the search, the others, being
+# shortest-path searches, from the solution they return.
+LEARN_FROM_PATH = [Algorithm.BFS, Algorithm.PARALLEL_BFS, Algorithm.FRONTIER_BFS, Algorithm.IDS]
+LEARNING = [Algorithm.A_STAR] + LEARN_FROM_PATH
+
+# Searches that already return (moves, totalCost); the others return moves only.
+COSTED = [Algorithm.A_STAR, Algorithm.PARALLEL_A_STAR, Algorithm.UCS, Algorithm.ANYTIME_A_STAR]
+
+
+def solve(board, start_state, algorithm, timeLimit=None, onSolution=None, workers=None, heuristic=None,
+          perimeterDepth=0, budget=None, compiled=True, criterion="moves", features=None, trace=None,
+          learn=False):
+    # heuristic names the A* heuristic; by default A* uses the game's
+    # blocking one and Parallel A* the admissible blockers one, so the
+    # parallel search stays optimal. perimeterDepth k > 0 lets BFS, IDS
+    # and A* stop k moves short of the goal (UCS: 2k in cost), using a
+    # perimeter cached per level. With a Budget, the search returns an
+    # Exhausted result once it runs out; building a perimeter counts
+    # against it. Anytime A* also returns Exhausted("time") when timeLimit
+    # passes before its first solution.
+    # compiled swaps in the move generator generated for this level.
+    # Algorithm.AUTO picks the engine for criterion from the level's
+    # features for start_state (computed here unless given) and records
+    # the choice in board.autoChoice as (algorithm, heuristic, reason).
+    # When the BFS probe behind the features already solved the level and
+    # BFS is picked, its path is the answer and no search runs again. A TraceRecorder
+    # given as trace records every expansion (not Parallel A*'s, which
+    # happen in its workers); the caller closes it. learn keeps per-level
+    # distance tables on disk that later A* solves of the level, from any
+    # start position, take as a lower bound on the moves left.
+    board.freezeIrrelevant(start_state)
+    if compiled:
+        specialise(board)
+    else:
+        generic(board)
+    board.perimeter = board.costPerimeter = None
+    probed = None
+    if algorithm == Algorithm.AUTO:
+        if features is None:
+            features = levelFeatures(board, start_state)
+        algorithm, heuristic, reason = chooseAlgorithm(features, criterion, workers)
+        board.autoChoice = (algorithm, heuristic, reason)
+        if algorithm == Algorithm.BFS and features.probePath is not None and trace is None:
+            probed = features
+    board.learned = loadLearned(board) if learn and algorithm in LEARNING else None
+
+    board.budget = None if budget is None else budget.start()
+    board.trace = None
+    started = time.monotonic()
+    try:
+        if perimeterDepth and algorithm in PERIMETER_MOVES:
+            board.perimeter = loadPerimeter(board, start_state, perimeterDepth)
+        elif perimeterDepth and algorithm in PERIMETER_COST:
+            board.costPerimeter = loadPerimeter(board, start_state, 2 * perimeterDepth, byCost=True)
+        board.trace = None if trace is None else trace.begin(board, algorithm.value)
+        if probed is not None:
+            result = list(probed.probePath)
+            board.nodesExpanded = probed.probeNodes
+        else:
+            result = _search(board, start_state, algorithm, timeLimit, onSolution, workers, heuristic)
+    except OutOfBudget as e:
+        return Exhausted(e.reason, e.nodes, e.states, time.monotonic() - started)
+    finally:
+        board.budget = board.trace = None
+
+    if board.learned is not None:
+        if result is not None and algorithm in LEARN_FROM_PATH:
+            board.learned.learnPath(start_state, result)
+        if board.learned.dirty:
+            saveLearned(board.learned)
+
+    if result is None or algorithm in COSTED:
+        return result
+    return result, sum(board.vehicles[vid].length for vid, _ in result)
+
+
+def _search(board, start_state, algorithm, timeLimit, onSolution, workers, heuristic):
+    if algorithm == Algorithm.A_STAR:
+        result = board.aStar(start_state, heuristic or 'blocking')
+    elif algorithm == Algorithm.PARALLEL_A_STAR:
+        result = parallelAStar(board, start_state, workers, heuristic or 'blockers')
+    elif algorithm == Algorithm.BFS:
+        result = layeredBfs(board, start_state) if canVectorize(board) else board.bfs(start_state)
+    elif algorithm == Algorithm.FRONTIER_BFS:
+        result = frontierBfs(board, start_state) if canVectorize(board) else board.bfs(start_state)
+    elif algorithm == Algorithm.PARALLEL_BFS:
+        result = parallelBfs(board, start_state, workers) if canVectorize(board) else board.bfs(start_state)
+    elif algorithm == Algorithm.IDS:
+        result = board.ids(start_state, max_depth=100)
+    elif algorithm == Algorithm.DFS:
+        result = board.dfs(start_state)
+    elif algorithm == Algorithm.UCS:
+        result = board.ucs(start_state)
+    elif algorithm == Algorithm.ANYTIME_A_STAR:
+        deadline = None if timeLimit is None else time.monotonic() + timeLimit
+        result = board.anytimeAStar(start_state, deadline=deadline, onSolution=onSolution)
+    elif algorithm == Algorithm.BEAM:
+        result = board.beamSearch(start_state)
+    elif algorithm == Algorithm.GREEDY:
+        result = board.greedy(start_state)
+    else:
+        result = board.aStar(start_state)
+    return result
+
+
+def optimalityGap(moves, levelInfo):
+    if levelInfo is None or levelInfo.optimalMoves == NO_SOLUTION:
+        return None
+    return len(moves) - levelInfo.optimalMoves
+
+
+def packedLevelInfo(path):
+    pack = LevelPack.openIfExists(os.path.join(os.path.dirname(path), "levels.pack"))
+    if pack is None:
+        return None
+    index = pack.indexOf(os.path.basename(path))
+    info = pack.info(index) if index is not None else None
+    pack.close()
+    return info
+
+
+def algorithmByValue(value):
+    for alg in Algorithm:
+        if alg.value.lower() == value.lower() or alg.name.lower() == value.lower():
+            return alg
+    raise argparse.ArgumentTypeError(f"unknown algorithm {value!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a Rush Hour level without the GUI.")
+    parser.add_argument("level", help="path to a level file, e.g. Map/level12.txt")
+    parser.add_argument("-a", "--algorithm", type=algorithmByValue, default=Algorithm.A_STAR,
+                        help="one of: " + ", ".join(alg.value for alg in Algorithm))
+    parser.add_argument("-t", "--time-limit", type=float, default=None,
+                        help="seconds before an anytime search returns its best solution")
+    parser.add_argument("--compact", action="store_true",
+                        help="keep visited states in array-backed tables to save memory")
+    parser.add_argument("--profile", metavar="DIR", default=None,
+                        help="sample the search and write a collapsed-stack flamegraph file to DIR")
+    parser.add_argument("--heuristic", choices=sorted(HEURISTICS), default=None,
+                        help="heuristic for A* and Parallel A* (default blocking for A*, blockers, which is "
+                             "admissible for move count, for Parallel A*)")
+    parser.add_argument("-p", "--perimeter", type=int, default=0, metavar="K",
+                        help="stop BFS, IDS, A* and UCS at a cached goal-side perimeter of depth K")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="processes for Parallel A* and Parallel BFS (default: one per CPU)")
+    parser.add_argument("--max-seconds", type=float, default=None, help="give up after this many seconds")
+    parser.add_argument("--max-nodes", type=int, default=None, help="give up after expanding this many nodes")
+    parser.add_argument("--max-memory", type=float, default=None, metavar="MB",
+                        help="give up once the search tables are estimated to hold this much")
+    parser.add_argument("--criterion", choices=CRITERIA, default="moves",
+                        help="what Auto optimises: fewest moves, lowest cost, or any solution")
+    parser.add_argument("--trace", metavar="FILE", default=None,
+                        help="record every expansion to FILE for searchTrace.py to analyse")
+    parser.add_argument("--learn", action="store_true",
+                        help="keep the distances optimal solves find and let later A* runs use them")
+    parser.add_argument("--generic", action="store_true",
+                        help="use the generic move generator instead of the one compiled for the level")
+    args = parser.parse_args(argv)
+
+    vehicles = loadLevelFile(args.level)
+    board = Board(vehicles, compactTables=args.compact)
+    start = initialState(vehicles)
+
+    def report(moves, cost, bound):
+        print(f"  improved: {len(moves)} moves, cost {cost}, within {bound:.3f}x of optimal")
+
+    # The first Ctrl-C cancels the search, which then reports how far it
+    # got; a second one interrupts as usual.
+    token = CancelToken()
+    memory = None if args.max_memory is None else int(args.max_memory * 1024 * 1024)
+    budget = Budget(args.max_seconds, args.max_nodes, memory, token)
+
+    def interrupt(signum, frame):
+        token.cancel()
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    trace = TraceRecorder(args.trace) if args.trace else None
+    profiler = SamplingProfiler().start() if args.profile else None
+    startTime = time.time()
+    previous = signal.signal(signal.SIGINT, interrupt)
+    try:
+        result = solve(board, start, args.algorithm, args.time_limit, report, args.workers, args.heuristic,
+                       args.perimeter, budget, not args.generic, args.criterion, trace=trace, learn=args.learn)
+    finally:
+        signal.signal(signal.SIGINT, previous)
+        if trace is not None:
+            trace.close()
+    elapsed = time.time() - startTime
+    if trace is not None:
+        print(f"Trace of {trace.records} expansions written to {args.trace}")
+    if profiler is not None:
+        profiler.stop()
+        level = os.path.splitext(os.path.basename(args.level))[0]
+        path = profiler.write(args.profile, level, args.algorithm.value)
+        print(f"Profile written to {path}" if path else "Search too short to sample")
+
+    name = ALGORITHM_NAMES.get(args.algorithm, args.algorithm.value)
+    if args.algorithm == Algorithm.AUTO:
+        chosen, heuristic, reason = board.autoChoice
+        print(f"Auto chose {chosen.value} ({reason})")
+        name = ALGORITHM_NAMES.get(chosen, chosen.value)
+    if isinstance(result, Exhausted):
+        stopped = "cancelled" if result.reason == "cancelled" else f"{result.reason} budget exhausted"
+        print(f"{name}: {stopped} after {result.elapsed:.3f}s "
+              f"({result.nodesExpanded} nodes expanded, {result.statesStored} states stored)")
+        return 2
+    if result is None:
+        print(f"{name}: no solution found in {elapsed:.3f}s ({board.nodesExpanded} nodes expanded)")
+        return 1
+
+    moves, cost = result
+    print(f"{name}: {len(moves)} moves, cost {cost}, {board.nodesExpanded} nodes expanded in {elapsed:.3f}s")
+    for stats in getattr(board, "workerStats", []):
+        print(f"  worker {stats['worker']}: {stats['expanded']} nodes, {stats['nodesPerSecond']:.0f} nodes/s")
+    gap = optimalityGap(moves, packedLevelInfo(args.level))
+    if gap is not None:
+        print(f"{gap} moves longer than optimal")
+    print(" ".join(f"{vid}{'+' if delta > 0 else '-'}" for vid, delta in moves))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
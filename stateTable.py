@@ -0,0 +1,123 @@
+from array import array
+
+EMPTY = -1
+NO_MOVE = -1
+NO_VALUE = -1    # a g, h or depth a search trace does not know
+FIBONACCI = 0x9E3779B97F4A7C15
+MASK64 = (1 << 64) - 1
+
+
+class DictTable(dict):
+    # Default store: a plain dict from state to an int value (g, depth or
+    # node id) plus the code of the move that reached the state.
+    def __init__(self):
+        super().__init__()
+        self.moves = {}
+
+    def put(self, state, value, move=NO_MOVE):
+        self[state] = value
+        self.moves[state] = move
+
+    def setParent(self, state, move):
+        self.moves[state] = move
+
+    def parentMove(self, state):
+        return self.moves.get(state, NO_MOVE)
+
+    def nbytes(self):
+        return None
+
+
+class StateTable:
+    # Open-addressing hash table over packed integer states. Keys, values
+    # and parent move codes live in parallel typed arrays, about 13 bytes
+    # per slot, instead of a dict entry plus a state tuple per state.
+    # Linear probing with Fibonacci hashing; the table grows by `growth`
+    # whenever it gets fuller than loadFactor.
+    def __init__(self, keyOf, capacity=1024, loadFactor=0.5, growth=2):
+        self.keyOf = keyOf
+        self.loadFactor = loadFactor
+        self.growth = growth
+        self.count = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.bits = max(3, (capacity - 1).bit_length())
+        size = 1 << self.bits
+        self.mask = size - 1
+        self.keys = array('q', [EMPTY]) * size
+        self.values = array('i', [0]) * size
+        self.moves = array('b', [NO_MOVE]) * size
+        self.limit = int(size * self.loadFactor)
+
+    def _slot(self, key):
+        i = ((key * FIBONACCI) & MASK64) >> (64 - self.bits)
+        keys = self.keys
+        while True:
+            k = keys[i]
+            if k == key or k == EMPTY:
+                return i
+            i = (i + 1) & self.mask
+
+    def _grow(self):
+        keys, values, moves = self.keys, self.values, self.moves
+        self._allocate(len(keys) * self.growth)
+        for k, value, move in zip(keys, values, moves):
+            if k != EMPTY:
+                i = self._slot(k)
+                self.keys[i] = k
+                self.values[i] = value
+                self.moves[i] = move
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, state):
+        return self.keys[self._slot(self.keyOf(state))] != EMPTY
+
+    def get(self, state, default=None):
+        i = self._slot(self.keyOf(state))
+        return self.values[i] if self.keys[i] != EMPTY else default
+
+    def __getitem__(self, state):
+        i = self._slot(self.keyOf(state))
+        if self.keys[i] == EMPTY:
+            raise KeyError(state)
+        return self.values[i]
+
+    def __setitem__(self, state, value):
+        self.put(state, value, None)
+
+    def put(self, state, value, move=NO_MOVE):
+        # move=None keeps the move already stored for an existing state.
+        key = self.keyOf(state)
+        i = self._slot(key)
+        if self.keys[i] == EMPTY:
+            if self.count >= self.limit:
+                self._grow()
+                i = self._slot(key)
+            self.keys[i] = key
+            self.count += 1
+            if move is None:
+                move = NO_MOVE
+        self.values[i] = value
+        if move is not None:
+            self.moves[i] = move
+
+    def items(self):
+        # (packed state, value) for every stored state.
+        for k, value in zip(self.keys, self.values):
+            if k != EMPTY:
+                yield k, value
+
+    def setParent(self, state, move):
+        i = self._slot(self.keyOf(state))
+        if self.keys[i] != EMPTY:
+            self.moves[i] = move
+
+    def parentMove(self, state):
+        i = self._slot(self.keyOf(state))
+        return self.moves[i] if self.keys[i] != EMPTY else NO_MOVE
+
+    def nbytes(self):
+        return sum(a.itemsize * len(a) for a in (self.keys, self.values, self.moves))
@@ -0,0 +1,256 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from vehicle import decodeMove
+
+ALL_CELLS = (1 << 64) - 1
+
+# Bytes kept per state for the memory budget: an int32 parent rank and an
+# int8 move code per layered BFS state; a code plus its relay in a frontier
+# layer.
+LAYER_STATE_BYTES = 5
+FRONTIER_STATE_BYTES = 16
+
+
+def canVectorize(board):
+    return (np is not None
+            and board.size * board.size <= 64
+            and board.laneBits * len(board.vehicles) <= 63)
+
+
+class MoveTables:
+    # Per-vehicle lookup tables indexed by lane position: the cells the
+    # vehicle covers, and the cell it would enter moving back or forward
+    # (every bit set when that move would leave the board).
+    def __init__(self, board):
+        n = board.size
+        self.occupied = []
+        self.back = []
+        self.front = []
+        for v in board.vehicles:
+            occupied, back, front = [], [], []
+            for pos in range(1 << board.laneBits):
+                cells = [pos + k for k in range(v.length)] if pos + v.length <= n else []
+                occupied.append(sum(1 << self.cell(v, c, n) for c in cells))
+                back.append(1 << self.cell(v, pos - 1, n) if cells and pos > 0 else ALL_CELLS)
+                front.append(1 << self.cell(v, pos + v.length, n) if cells and pos + v.length < n else ALL_CELLS)
+            self.occupied.append(np.array(occupied, dtype=np.uint64))
+            self.back.append(np.array(back, dtype=np.uint64))
+            self.front.append(np.array(front, dtype=np.uint64))
+
+    @staticmethod
+    def cell(v, lanePos, n):
+        return v.row * n + lanePos if v.isHorizontal else lanePos * n + v.col
+
+
+def _member(sortedStates, states):
+    if len(sortedStates) == 0:
+        return np.zeros(len(states), dtype=bool)
+    idx = np.searchsorted(sortedStates, states)
+    idx[idx == len(sortedStates)] = 0
+    return sortedStates[idx] == states
+
+
+def expandLayer(tables, bits, active, layer, current, previous, offset=0, lastMoves=None):
+    # Successors of layer that are not in the sorted arrays current or
+    # previous, each kept once, in the order Board.bfs would discover them.
+    # Returns them with their ranks, (offset + parent index) * width + move
+    # code, so a slice of a layer can be expanded on its own. lastMoves
+    # holds the code of the move into each state of layer, and moves that
+    # commute with it are skipped as in Board.iterSuccessors.
+    laneMask = np.int64((1 << bits) - 1)
+    vehicleCount = len(tables.occupied)
+    width = 2 * vehicleCount
+
+    positions = [(layer >> np.int64(vid * bits)) & laneMask for vid in range(vehicleCount)]
+    occ = np.zeros(len(layer), dtype=np.uint64)
+    for vid in range(vehicleCount):
+        occ |= tables.occupied[vid][positions[vid]]
+
+    if lastMoves is not None:
+        # The cell each state's last move left: the one its vehicle would
+        # enter moving straight back.
+        lastVehicles = lastMoves.astype(np.int64) >> 1
+        vacated = np.zeros(len(layer), dtype=np.uint64)
+        for vid in active:
+            moved = np.flatnonzero(lastVehicles == vid)
+            forward = (lastMoves[moved] & 1).astype(bool)
+            pos = positions[vid][moved]
+            vacated[moved] = np.where(forward, tables.back[vid][pos], tables.front[vid][pos])
+
+    order = (np.arange(len(layer), dtype=np.int64) + offset) * width
+    candidates, ranks = [], []
+    for vid in active:
+        step = np.int64(1 << (vid * bits))
+        for direction, table, delta in ((0, tables.back, -step), (1, tables.front, step)):
+            entered = table[vid][positions[vid]]
+            ok = (occ & entered) == 0
+            if lastMoves is not None:
+                ok &= (lastVehicles <= vid) | (entered == vacated)
+            candidates.append(layer[ok] + delta)
+            ranks.append(order[ok] + (vid << 1 | direction))
+
+    if not candidates:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    candidates = np.concatenate(candidates)
+    ranks = np.concatenate(ranks)
+
+    # First discovery wins: sort by state then rank, keep each state's
+    # lowest rank, then drop states already seen in the last two layers.
+    byState = np.lexsort((ranks, candidates))
+    candidates, ranks = candidates[byState], ranks[byState]
+    first = np.ones(len(candidates), dtype=bool)
+    first[1:] = candidates[1:] != candidates[:-1]
+    candidates, ranks = candidates[first], ranks[first]
+
+    fresh = ~(_member(current, candidates) | _member(previous, candidates))
+    candidates, ranks = candidates[fresh], ranks[fresh]
+
+    byRank = np.argsort(ranks, kind='stable')
+    return candidates[byRank], ranks[byRank]
+
+
+def layeredBfs(board, start_state, expand=None):
+    # Breadth-first search one layer at a time over packed int64 states.
+    # Every move is reversible, so the successors of layer k can only lie in
+    # layers k - 1, k and k + 1, and duplicates are removed against just the
+    # two previous layers. Within a layer states are kept in the order
+    # Board.bfs would dequeue them, so the first goal and its path match.
+    # expand(layer, current, previous, lastMoves) -> (states, ranks)
+    # replaces the in-process expandLayer call, e.g. with a parallel one.
+    if expand is None:
+        tables = MoveTables(board)
+        active = list(board.activeVehicles)
+        expand = lambda layer, current, previous, lastMoves: expandLayer(
+            tables, board.laneBits, active, layer, current, previous, lastMoves=lastMoves)
+    isTarget, tail = _targets(board)
+    width = 2 * len(board.vehicles)
+
+    layer = np.array([board.pack(start_state)], dtype=np.int64)
+    previous = np.empty(0, dtype=np.int64)
+    parents, codes = [], []
+    lastMoves = None
+    stored = 0
+    board.nodesExpanded = 0
+    board.widestLayer = 0
+
+    while len(layer):
+        goals = np.flatnonzero(isTarget(layer))
+        if len(goals):
+            board.nodesExpanded += int(goals[0]) + 1
+            if board.trace is not None:
+                board.trace.recordLayer(layer[:goals[0] + 1], len(parents),
+                                        None if lastMoves is None else lastMoves[:goals[0] + 1])
+            return _path(parents, codes, int(goals[0])) + tail(int(layer[goals[0]]))
+        if board.trace is not None:
+            board.trace.recordLayer(layer, len(parents), lastMoves)
+        board.nodesExpanded += len(layer)
+        board.widestLayer = max(board.widestLayer, len(layer))
+        stored += len(layer)
+        if board.budget is not None:
+            board.budget.check(board.nodesExpanded, stored, LAYER_STATE_BYTES)
+
+        current = np.sort(layer)
+        layer, ranks = expand(layer, current, previous, lastMoves)
+        previous = current
+        parents.append((ranks // width).astype(np.int32))
+        lastMoves = (ranks % width).astype(np.int8)
+        codes.append(lastMoves)
+
+    return None
+
+
+def _targets(board):
+    # What a layer search stops at: goal states, or with a perimeter any of
+    # its members, plus the moves that finish the path from there.
+    if board.perimeter is None:
+        laneMask = np.int64((1 << board.laneBits) - 1)
+        goalPos = board.size - board.vehicles[0].length
+        return (lambda layer: (layer & laneMask) == goalPos), (lambda code: [])
+    members = board.perimeter.sortedArrays()[0]
+    return (lambda layer: _member(members, layer)), (lambda code: board.perimeter.tail(board.unpack(code)))
+
+
+def _frontier(board, tables, active, source, isTarget, relayDepth=None, trace=None):
+    # Layer BFS from the packed state source that keeps only the last two
+    # layers. Each state in the current layer carries its ancestor at
+    # relayDepth. Returns (depth, target, relay) for the first state that
+    # isTarget accepts, or None. Layers are recorded in trace if given.
+    width = 2 * len(board.vehicles)
+    layer = np.array([source], dtype=np.int64)
+    relay = layer
+    previous = np.empty(0, dtype=np.int64)
+    lastMoves = None
+    depth = 0
+
+    while len(layer):
+        hits = np.flatnonzero(isTarget(layer))
+        if len(hits):
+            if trace is not None:
+                trace.recordLayer(layer[:hits[0] + 1], depth, None if lastMoves is None else lastMoves[:hits[0] + 1])
+            return depth, int(layer[hits[0]]), int(relay[hits[0]])
+        if trace is not None:
+            trace.recordLayer(layer, depth, lastMoves)
+        board.nodesExpanded += len(layer)
+        board.widestLayer = max(board.widestLayer, len(layer))
+        if board.budget is not None:
+            board.budget.check(board.nodesExpanded, len(layer) + len(previous), FRONTIER_STATE_BYTES)
+
+        current = np.sort(layer)
+        successors, ranks = expandLayer(tables, board.laneBits, active, layer, current, previous,
+                                        lastMoves=lastMoves)
+        lastMoves = ranks % width
+        depth += 1
+        if relayDepth is None or depth == relayDepth:
+            relay = successors
+        elif depth > relayDepth:
+            relay = relay[ranks // width]
+        previous, layer = current, successors
+
+    return None
+
+
+def frontierBfs(board, start_state):
+    # Breadth-first frontier search: no closed list and no parent table,
+    # so memory is bounded by the widest layer instead of every visited
+    # state. The first pass only finds the goal and its depth d. The path
+    # is then rebuilt by divide and conquer: a search from a towards b
+    # relays the state at depth d // 2 on b's shortest path, and the two
+    # halves are solved the same way down to single moves. The result is a
+    # shortest path, found with O(log d) extra passes.
+    tables = MoveTables(board)
+    active = list(board.activeVehicles)
+    isTarget, tail = _targets(board)
+    board.nodesExpanded = 0
+    board.widestLayer = 0
+
+    # Only the first pass is traced; the rebuild passes search between
+    # states of the path already found.
+    source = board.pack(start_state)
+    found = _frontier(board, tables, active, source, isTarget, trace=board.trace)
+    if found is None:
+        return None
+    depth, goal, _ = found
+
+    def between(a, b, distance):
+        if distance == 0:
+            return []
+        if distance == 1:
+            diff = b - a
+            return [((abs(diff).bit_length() - 1) // board.laneBits, 1 if diff > 0 else -1)]
+        half = distance // 2
+        _, _, middle = _frontier(board, tables, active, a, lambda layer: layer == b, half)
+        return between(a, middle, half) + between(middle, b, distance - half)
+
+    return between(source, goal, depth) + tail(goal)
+
+
+def _path(parents, codes, index):
+    path = []
+    for k in range(len(parents) - 1, -1, -1):
+        path.append(decodeMove(int(codes[k][index])))
+        index = int(parents[k][index])
+    path.reverse()
+    return path
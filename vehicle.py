@@ -1,7 +1,13 @@
 from dataclasses import dataclass
 import heapq
+import time
 from collections import deque
 
+from bucketQueue import BucketQueue
+from stateTable import DictTable, StateTable, NO_MOVE, NO_VALUE
+from heuristics import HEURISTICS, BlockersHeuristic, BlockingHeuristic, LearnedHeuristic, PerimeterHeuristic
+from budget import CHECK_MASK, COMPACT_STATE_BYTES, DICT_STATE_BYTES, OutOfBudget
+
 @dataclass(frozen=True)
 class Vehicle:
     vehicleId: int       
@@ -10,11 +16,86 @@ class Vehicle:
     length: int          
     isHorizontal: bool   
 
+def encodeMove(vid, delta):
+    return (vid << 1) | (delta > 0)
+
+def decodeMove(code):
+    return code >> 1, 1 if code & 1 else -1
+
+class BoundedFilter:
+    # Fixed-size Bloom filter (two probes into a bit array). A false positive
+    # drops a state that was never visited, which can cost solution quality
+    # but, unlike an evicting table, never lets the search cycle.
+    def __init__(self, bits):
+        self.mask = bits - 1
+        self.bits = bytearray(bits >> 3)
+
+    def seen(self, state):
+        h = hash(state)
+        i = h & self.mask
+        j = (h >> 32) & self.mask
+        if self.bits[i >> 3] & (1 << (i & 7)) and self.bits[j >> 3] & (1 << (j & 7)):
+            return True
+        self.bits[i >> 3] |= 1 << (i & 7)
+        self.bits[j >> 3] |= 1 << (j & 7)
+        return False
+
 class Board:
-    def __init__(self, vehicles, size=6):
+    def __init__(self, vehicles, size=6, compactTables=False):
         self.vehicles = vehicles
         self.size = size
         self.nodesExpanded = 0
+        self.activeVehicles = range(len(vehicles))
+        self.laneBits = max(1, (size - 1).bit_length())
+        # Compact tables key on packed states in int64 slots, so boards whose
+        # packed state needs more than 63 bits fall back to dict tables.
+        self.compactTables = compactTables and self.laneBits * len(vehicles) <= 63
+        self.h = BlockingHeuristic(self)
+        # Goal-side perimeters (see perimeter.py): in moves for BFS, IDS
+        # and A*, in move costs for UCS. Searches treat touching one as
+        # reaching the goal and append its stored tail.
+        self.perimeter = None
+        self.costPerimeter = None
+        # Budget (see budget.py) polled by every search, set by solve().
+        self.budget = None
+        # TraceRecorder (see searchTrace.py) told about every expansion
+        # when solve() is asked for a trace.
+        self.trace = None
+        # DistanceTable (see learnedHeuristic.py) that A* takes distances
+        # from and, with an admissible heuristic, adds to. Set by solve().
+        self.learned = None
+        self.stateBytes = COMPACT_STATE_BYTES if self.compactTables else DICT_STATE_BYTES
+        self._packFields = [
+            ((vid << 1) + 1 if v.isHorizontal else vid << 1, vid * self.laneBits)
+            for vid, v in enumerate(vehicles)
+        ]
+
+    # A packed state stores each vehicle's position along its lane (its
+    # column if horizontal, its row if vertical) in laneBits bits.
+    def lanePos(self, state, vid):
+        return state[(vid << 1) + 1] if self.vehicles[vid].isHorizontal else state[vid << 1]
+
+    def pack(self, state):
+        code = 0
+        for index, shift in self._packFields:
+            code |= state[index] << shift
+        return code
+
+    def unpack(self, code):
+        mask = (1 << self.laneBits) - 1
+        state = []
+        for v in self.vehicles:
+            pos = code & mask
+            code >>= self.laneBits
+            state += (v.row, pos) if v.isHorizontal else (pos, v.col)
+        return tuple(state)
+
+    def newTable(self):
+        # Store for visited flags, g-values and parent move codes. The
+        # compact table trades some speed for a few bytes per state.
+        if self.compactTables:
+            return StateTable(self.pack)
+        return DictTable()
 
     def buildOccupied(self, state):
         occ = set()
@@ -55,17 +136,123 @@ class Board:
         
         return moves
 
-    def successors(self, state):
-        succs = []
-        occ = self.buildOccupied(state)
-        
+    def enteredCell(self, state, vid, delta):
+        # The cell vehicle vid moves into when it slides by delta.
+        r, c = state[vid << 1], state[(vid << 1) + 1]
+        if self.vehicles[vid].isHorizontal:
+            return (r, c - 1) if delta < 0 else (r, c + self.vehicles[vid].length)
+        return (r - 1, c) if delta < 0 else (r + self.vehicles[vid].length, c)
+
+    def laneCells(self, vid, start, end):
+        v = self.vehicles[vid]
+        if v.isHorizontal:
+            return {(v.row, k) for k in range(start, end)}
+        return {(k, v.col) for k in range(start, end)}
+
+    def vehicleCells(self, state, vid):
+        v = self.vehicles[vid]
+        r, c = state[vid << 1], state[(vid << 1) + 1]
+        if v.isHorizontal:
+            return {(r, c + k) for k in range(v.length)}
+        return {(r + k, c) for k in range(v.length)}
+
+    def laneSpans(self, state):
+        # Over-approximates the cells each vehicle can ever reach. A vehicle
+        # can move only if a lane neighbour is empty or held by a vehicle that
+        # can itself move; the rest never move and wall in everybody else.
+        occupant = {}
         for vid in range(len(self.vehicles)):
-            moves = self.get_valid_moves(state, vid, occ)
-            for delta in moves:
-                new_state = self.move(state, vid, delta)
-                succs.append((new_state, (vid, delta)))
-        
-        return succs
+            for cell in self.vehicleCells(state, vid):
+                occupant[cell] = vid
+
+        ends = {}
+        for vid, v in enumerate(self.vehicles):
+            pos = self.lanePos(state, vid)
+            ends[vid] = (pos, pos + v.length)
+
+        movable = set()
+        changed = True
+        while changed:
+            changed = False
+            for vid, (lo, hi) in ends.items():
+                if vid in movable:
+                    continue
+                for k in (lo - 1, hi):
+                    if 0 <= k < self.size:
+                        (cell,) = self.laneCells(vid, k, k + 1)
+                        other = occupant.get(cell)
+                        if other is None or other in movable:
+                            movable.add(vid)
+                            changed = True
+                            break
+
+        fixed = set(range(len(self.vehicles))) - movable
+        walls = set()
+        for vid in fixed:
+            walls |= self.vehicleCells(state, vid)
+
+        spans = {}
+        for vid, (lo, hi) in ends.items():
+            if vid in movable:
+                while lo > 0 and not (self.laneCells(vid, lo - 1, lo) & walls):
+                    lo -= 1
+                while hi < self.size and not (self.laneCells(vid, hi, hi + 1) & walls):
+                    hi += 1
+            spans[vid] = self.laneCells(vid, lo, hi)
+        return spans, fixed
+
+    def relevantVehicles(self, state):
+        # A vehicle matters only if its span overlaps the span of the red car
+        # or of another vehicle that matters. Everything else can never block
+        # a relevant vehicle, so dropping its moves keeps solutions optimal.
+        spans, fixed = self.laneSpans(state)
+        relevant = {0}
+        reach = set(spans[0])
+        changed = True
+        while changed:
+            changed = False
+            for vid in range(1, len(self.vehicles)):
+                if vid in relevant or vid in fixed:
+                    continue
+                if spans[vid] & reach:
+                    relevant.add(vid)
+                    reach |= spans[vid]
+                    changed = True
+        return sorted(relevant)
+
+    def freezeIrrelevant(self, state):
+        self.activeVehicles = self.relevantVehicles(state)
+        return len(self.vehicles) - len(self.activeVehicles)
+
+    def unfreeze(self):
+        self.activeVehicles = range(len(self.vehicles))
+
+    def iterSuccessors(self, state, lastMove=NO_MOVE):
+        # lastMove is the code of the move that produced state, if known.
+        # Two moves of different vehicles commute unless the second enters
+        # the cell the first just left, so a move of a lower-numbered vehicle
+        # that commutes with lastMove is skipped: the same two moves in
+        # ascending vehicle order reach the same state in as many steps.
+        # Searches that discover every state at its exact depth (or cost),
+        # keeping the move of that first discovery, stay complete and
+        # optimal with it; see Board.bfs, Board.ucs and Board.ids.
+        occ = self.buildOccupied(state)
+        if lastMove == NO_MOVE:
+            for vid in self.activeVehicles:
+                for delta in self.get_valid_moves(state, vid, occ):
+                    yield self.move(state, vid, delta), (vid, delta)
+            return
+
+        last, lastDelta = decodeMove(lastMove)
+        vacated = self.enteredCell(state, last, -lastDelta)
+        for vid in self.activeVehicles:
+            for delta in self.get_valid_moves(state, vid, occ):
+                if vid < last and self.enteredCell(state, vid, delta) != vacated:
+                    continue
+                yield self.move(state, vid, delta), (vid, delta)
+
+    def successors(self, state, lastMove=NO_MOVE):
+        return list(self.iterSuccessors(state, lastMove))
 
     def isGoal(self, state):
         red_col = state[1]
@@ -73,170 +260,421 @@ class Board:
         return red_tail == self.size - 1
 
     
-    def h(self, state):
-        red_row, red_col = state[0], state[1]
-        red_tail = red_col + self.vehicles[0].length - 1
-        gap = (self.size - 1) - red_tail
-        blocks = 0
-        for vid, v in enumerate(self.vehicles[1:], 1):
-            if v.isHorizontal: 
-                continue
-            c = state[vid * 2 + 1]
-            if c == red_tail + 1:
-                r = state[vid * 2]
-                if r <= red_row < r + v.length:
-                    blocks += 1
-        return gap + 2 * blocks
-
-    def aStar(self, start_state, heuristic='blocking'):
-        h_func = self.h  
-        g_cost = {start_state: 0}
-        pq = [(h_func(start_state), 0, start_state)]
-        parent = {start_state: None}
+    def aStar(self, start_state, heuristic='blocking', largerGFirst=True):
+        # Successor h-values are derived incrementally from the parent's,
+        # which the queue hands back as lastF - g. Learned distances only
+        # raise an admissible h to another lower bound, so such a run stays
+        # optimal and its g-values can be learned from in turn; a state with
+        # a learned exact distance ends the search like a perimeter member.
+        h_func = HEURISTICS[heuristic](self)
+        learned = self.learned
+        learns = learned is not None and h_func.admissible
+        perimeter = self.perimeter
+        at_goal = self.isGoal
+        if learned:
+            h_func = LearnedHeuristic(h_func, learned)
+            is_goal = at_goal
+            at_goal = lambda state: is_goal(state) or learned.exact(state) is not None
+        if perimeter is not None:
+            h_func = PerimeterHeuristic(h_func, perimeter)
+            inner_goal = at_goal
+            at_goal = lambda state: perimeter.distance(state) is not None or inner_goal(state)
+        update = h_func.update
+        budget = self.budget
+        trace = self.trace
+        open_list = BucketQueue(largerGFirst, self.newTable())
+        open_list.push(start_state, h_func(start_state), 0)
         self.nodesExpanded = 0
 
-        while pq:
-            f, g_cur, current = heapq.heappop(pq)
-
-            if g_cur > g_cost.get(current, float('inf')):
-                continue
-
+        while open_list:
+            current, g_cur = open_list.pop()
+            h_cur = open_list.lastF - g_cur
             self.nodesExpanded += 1
+            if budget is not None and not self.nodesExpanded & CHECK_MASK:
+                budget.check(self.nodesExpanded, len(open_list.g), self.stateBytes)
+            if trace is not None:
+                trace.record(self.pack(current), g_cur, h_cur, g_cur, open_list.parentMove(current))
 
-            if self.isGoal(current):
-                path = self._reconstruct_path(parent, current)
+            if at_goal(current):
+                path = self._reconstruct_path(open_list, current)
+                if perimeter is not None and perimeter.distance(current) is not None:
+                    path += perimeter.tail(current)
+                elif learned and not self.isGoal(current):
+                    path += learned.tail(current)
+                if learns:
+                    learned.learnBounds(open_list.packedCosts(self.pack), len(path))
+                    learned.learnPath(start_state, path)
                 total_cost = sum(self.vehicles[vid].length for vid, _ in path)
                 return path, total_cost
 
-            for next_state, move in self.successors(current):
+            for next_state, (vid, delta) in self.iterSuccessors(current):
                 g_next = g_cur + 1  
-                if g_next < g_cost.get(next_state, float('inf')):
-                    g_cost[next_state] = g_next
-                    parent[next_state] = (current, move)
-                    f_next = g_next + h_func(next_state)
-                    heapq.heappush(pq, (f_next, g_next, next_state))
+                if open_list.improves(next_state, g_next):
+                    h_next = update(h_cur, current, next_state, vid)
+                    open_list.push(next_state, g_next + h_next, g_next, encodeMove(vid, delta))
+
+        return None
+
+    def anytimeAStar(self, start_state, weight=3.0, weightStep=0.5, deadline=None, onSolution=None):
+        # ARA*: weighted A* that keeps its g-values, parents and frontier
+        # between passes. Each pass lowers the weight and only re-expands
+        # states whose g improved, publishing every better solution with
+        # its suboptimality bound. self.h guides the search but can
+        # overestimate, so the bound comes from the admissible blockers
+        # heuristic over the states still pending instead. Stops at the
+        # time.monotonic() deadline, or when the budget runs out, with the
+        # best solution so far; either one raises OutOfBudget when there is
+        # no solution yet.
+        h_func = self.h
+        lower_h = BlockersHeuristic(self)
+        budget = self.budget
+        trace = self.trace
+        g_cost = self.newTable()
+        g_cost.put(start_state, 0)
+        self.nodesExpanded = 0
+        self.suboptimalityBound = None
+
+        best = published = None
+        best_g = float('inf')
+        w = weight
+        openSet = {start_state}
+        incons = set()
+
+        while True:
+            pq = [(g_cost[s] + w * h_func(s), -g_cost[s], s) for s in openSet]
+            heapq.heapify(pq)
+            closed = self.newTable()
+
+            while pq and pq[0][0] < best_g:
+                if deadline is not None and (self.nodesExpanded & 255) == 0 and time.monotonic() > deadline:
+                    if best is None:
+                        raise OutOfBudget("time", self.nodesExpanded, len(g_cost))
+                    return best
+
+                f, neg_g, current = heapq.heappop(pq)
+                g_cur = -neg_g
+                if g_cur > g_cost[current] or current not in openSet:
+                    continue
+                openSet.discard(current)
+                closed[current] = g_cur
+                self.nodesExpanded += 1
+                if budget is not None and not self.nodesExpanded & CHECK_MASK:
+                    try:
+                        budget.check(self.nodesExpanded, len(g_cost), self.stateBytes)
+                    except OutOfBudget:
+                        if best is None:
+                            raise
+                        return best
+                if trace is not None:
+                    trace.record(self.pack(current), g_cur, h_func(current), g_cur, g_cost.parentMove(current))
+
+                if self.isGoal(current):
+                    if g_cur < best_g:
+                        best_g = g_cur
+                        path = self._reconstruct_path(g_cost, current)
+                        best = (path, sum(self.vehicles[vid].length for vid, _ in path))
+                    continue
+
+                for next_state, (vid, delta) in self.iterSuccessors(current):
+                    g_next = g_cur + 1
+                    if g_next < g_cost.get(next_state, float('inf')):
+                        g_cost.put(next_state, g_next, encodeMove(vid, delta))
+                        if next_state in closed:
+                            incons.add(next_state)
+                        else:
+                            openSet.add(next_state)
+                            heapq.heappush(pq, (g_next + w * h_func(next_state), -g_next, next_state))
+
+            if best is None:
+                return None
+
+            pending = openSet | incons
+            lower = min((g_cost[s] + lower_h(s) for s in pending), default=best_g)
+            bound = max(1.0, best_g / lower) if lower > 0 else 1.0
+            if onSolution and (published is not best or bound < self.suboptimalityBound):
+                onSolution(best[0], best[1], bound)
+            published = best
+            self.suboptimalityBound = bound
+
+            if w <= 1.0 or self.suboptimalityBound <= 1.0:
+                return best
+            if deadline is not None and time.monotonic() > deadline:
+                return best
+
+            w = max(1.0, w - weightStep)
+            openSet |= incons
+            incons = set()
+
+    def beamSearch(self, start_state, beamWidth=500, maxNodes=100000, filterBits=1 << 22):
+        # Keeps only the beamWidth best states of each layer by h. Nodes are
+        # (state, parent node, move) chains, so paths survive only as long as
+        # a descendant is still in the beam.
+        seen = BoundedFilter(filterBits)
+        seen.seen(start_state)
+        beam = [(start_state, None, None)]
+        budget = self.budget
+        trace = self.trace
+        depth = 0
+        self.nodesExpanded = 0
+
+        while beam and self.nodesExpanded < maxNodes:
+            layer = []
+            for node in beam:
+                self.nodesExpanded += 1
+                if budget is not None and not self.nodesExpanded & CHECK_MASK:
+                    budget.check(self.nodesExpanded, len(layer), self.stateBytes)
+                if trace is not None:
+                    move = NO_MOVE if node[2] is None else encodeMove(*node[2])
+                    trace.record(self.pack(node[0]), depth, self.h(node[0]), depth, move)
+                if self.isGoal(node[0]):
+                    return self._reconstruct_chain(node)
+                for next_state, move in self.iterSuccessors(node[0]):
+                    if not seen.seen(next_state):
+                        layer.append((next_state, node, move))
+            beam = heapq.nsmallest(beamWidth, layer, key=lambda n: self.h(n[0]))
+            depth += 1
+
+        return None
+
+    def greedy(self, start_state, maxNodes=100000, maxOpen=20000, filterBits=1 << 22):
+        # Greedy best-first on h alone. The open list is cut back to its
+        # maxOpen best entries whenever it doubles past that size.
+        seen = BoundedFilter(filterBits)
+        seen.seen(start_state)
+        counter = 0
+        pq = [(self.h(start_state), counter, (start_state, None, None))]
+        budget = self.budget
+        trace = self.trace
+        self.nodesExpanded = 0
+
+        while pq and self.nodesExpanded < maxNodes:
+            h_cur, _, node = heapq.heappop(pq)
+            self.nodesExpanded += 1
+            if budget is not None and not self.nodesExpanded & CHECK_MASK:
+                budget.check(self.nodesExpanded, len(pq), self.stateBytes)
+            if trace is not None:
+                move = NO_MOVE if node[2] is None else encodeMove(*node[2])
+                trace.record(self.pack(node[0]), NO_VALUE, h_cur, NO_VALUE, move)
+            if self.isGoal(node[0]):
+                return self._reconstruct_chain(node)
+
+            for next_state, move in self.iterSuccessors(node[0]):
+                if not seen.seen(next_state):
+                    counter += 1
+                    heapq.heappush(pq, (self.h(next_state), counter, (next_state, node, move)))
+
+            if len(pq) > 2 * maxOpen:
+                pq = heapq.nsmallest(maxOpen, pq)
+                heapq.heapify(pq)
 
         return None
 
     def bfs(self, start_state):
+        # With a perimeter, the first member generated is on a shortest
+        # path: its parent was outside, so it sits exactly on the boundary.
+        perimeter = self.perimeter
+        budget = self.budget
+        trace = self.trace
         queue = deque([start_state])
-        parent = {start_state: None}
-        visited = {start_state}
+        visited = self.newTable()
+        visited.put(start_state, 0)
+        next_depth = 0
         self.nodesExpanded = 0
+        if perimeter is not None and perimeter.distance(start_state) is not None:
+            return perimeter.tail(start_state)
         
         while queue:
             current = queue.popleft()
             self.nodesExpanded += 1
+            if budget is not None and not self.nodesExpanded & CHECK_MASK:
+                budget.check(self.nodesExpanded, len(visited), self.stateBytes)
+            lastMove = visited.parentMove(current)
+            if trace is not None:
+                # Depths are only kept when a trace needs them.
+                depth = visited[current]
+                trace.record(self.pack(current), depth, NO_VALUE, depth, lastMove)
+                next_depth = depth + 1
             
             if self.isGoal(current):
-                return self._reconstruct_path(parent, current)
+                return self._reconstruct_path(visited, current)
             
-            for next_state, move in self.successors(current):
+            for next_state, (vid, delta) in self.iterSuccessors(current, lastMove):
                 if next_state not in visited:
-                    visited.add(next_state)
-                    parent[next_state] = (current, move)
+                    visited.put(next_state, next_depth, encodeMove(vid, delta))
+                    if perimeter is not None and perimeter.distance(next_state) is not None:
+                        return self._reconstruct_path(visited, next_state) + perimeter.tail(next_state)
                     queue.append(next_state)
         
         return None
 
     def ucs(self, start_state):
-        g_cost = {start_state: 0}
-        pq = [(0, start_state)]
-        parent = {start_state: None}
+        # With a cost perimeter every member reached gives a complete
+        # solution of known cost. Anything still outside costs more than
+        # the perimeter's bound to finish, so once the cheapest open g plus
+        # bound + 1 reaches the best solution, no better one remains.
+        perimeter = self.costPerimeter
+        budget = self.budget
+        trace = self.trace
+        best, best_cost = None, float('inf')
+        open_list = BucketQueue(index=self.newTable())
+        open_list.push(start_state, 0, 0)
         self.nodesExpanded = 0
+        if perimeter is not None and perimeter.distance(start_state) is not None:
+            best, best_cost = start_state, perimeter.distance(start_state)
         
-        while pq:
-            cost, current = heapq.heappop(pq)
-            
-            if cost > g_cost.get(current, float('inf')):
-                continue
-                
+        while open_list:
+            current, cost = open_list.pop()
+            if perimeter is not None and cost + perimeter.bound + 1 >= best_cost:
+                break
             self.nodesExpanded += 1
+            if budget is not None and not self.nodesExpanded & CHECK_MASK:
+                budget.check(self.nodesExpanded, len(open_list.g), self.stateBytes)
+            lastMove = open_list.parentMove(current)
+            if trace is not None:
+                trace.record(self.pack(current), cost, NO_VALUE, NO_VALUE, lastMove)
             
             if self.isGoal(current):
-                path = self._reconstruct_path(parent, current)
+                path = self._reconstruct_path(open_list, current)
                 total_cost = sum(self.vehicles[vid].length for vid, _ in path)
                 return path, total_cost
             
-            for next_state, (vid, delta) in self.successors(current):
+            for next_state, (vid, delta) in self.iterSuccessors(current, lastMove):
                 move_cost = self.vehicles[vid].length  # Cost = vehicle length
                 g_next = cost + move_cost
-                
-                if g_next < g_cost.get(next_state, float('inf')):
-                    g_cost[next_state] = g_next
-                    parent[next_state] = (current, (vid, delta))
-                    heapq.heappush(pq, (g_next, next_state))
+                if open_list.push(next_state, g_next, g_next, encodeMove(vid, delta)) and perimeter is not None:
+                    remaining = perimeter.distance(next_state)
+                    if remaining is not None and g_next + remaining < best_cost:
+                        best, best_cost = next_state, g_next + remaining
         
-        return None
+        if best is None:
+            return None
+        path = self._reconstruct_path(open_list, best) + perimeter.tail(best)
+        return path, sum(self.vehicles[vid].length for vid, _ in path)
 
 
     def ids(self, start_state, max_depth = 300):
         self.nodesExpanded = 0  
 
         for depth_limit in range(max_depth):
-            visited = {}
-            parent = {start_state: None}
-            found = self._dls_recursive(start_state, depth_limit, 0, visited, parent)
+            visited = self.newTable()
+            found = self._dls_recursive(start_state, depth_limit, 0, visited, NO_MOVE)
             if found:
-                return self._reconstruct_path(parent, found)
+                path = self._reconstruct_path(visited, found)
+                if self.perimeter is not None:
+                    path += self.perimeter.tail(found)
+                return path
         return None
 
 
-    def _dls_recursive(self,state,depth_limit,depth,visited,parent):
-
-        if state in visited:
-            return None
-
-        visited[state] = depth
+    def _dls_recursive(self,state,depth_limit,depth,visited,move):
+        # visited keeps the smallest depth each state was reached at in this
+        # iteration, and a state reached again at a smaller one is searched
+        # again from there. Every state within the limit is thus expanded at
+        # its true depth, which keeps the result shortest and lets the
+        # successors skip commuting move orders (see iterSuccessors).
+        visited.put(state, depth, move)
         self.nodesExpanded += 1
+        if self.budget is not None and not self.nodesExpanded & CHECK_MASK:
+            self.budget.check(self.nodesExpanded, len(visited), self.stateBytes)
+        if self.trace is not None:
+            self.trace.record(self.pack(state), depth, NO_VALUE, depth, move)
 
         if self.isGoal(state):
             return state
 
+        # A perimeter member's distance is exact; anything outside it needs
+        # more than bound moves, so stop as soon as the limit rules it out.
+        perimeter = self.perimeter
+        if perimeter is not None:
+            remaining = perimeter.distance(state)
+            if remaining is not None:
+                return state if depth + remaining <= depth_limit else None
+            if depth + perimeter.bound + 1 > depth_limit:
+                return None
+
         if depth < depth_limit:
-            for s2, move in self.successors(state):
-                if s2 not in visited or visited[s2] > depth + 1:
-                    parent[s2] = (state, move)
-                    found = self._dls_recursive(s2, depth_limit, depth + 1, visited, parent)
+            for s2, (vid, delta) in self.iterSuccessors(state, move):
+                seen_depth = visited.get(s2)
+                if seen_depth is None or seen_depth > depth + 1:
+                    found = self._dls_recursive(s2, depth_limit, depth + 1, visited, encodeMove(vid, delta))
                     if found:
                         return found
         return None
 
+    def dfs(self, start_state, max_depth=None):
+        self.nodesExpanded = 0
+        return self._dfs_limited(start_state, float('inf') if max_depth is None else max_depth)
+
     def _dfs_limited(self, start_state, depth_limit):
-        stack = [(start_state, 0, [])]
-        visited = set()
+        # One successor iterator per level of the current branch and a single
+        # path buffer that grows and shrinks with it, so nothing is copied.
+        visited = self.newTable()
+        visited[start_state] = 0
+        self.nodesExpanded += 1
+        trace = self.trace
+        if trace is not None:
+            trace.record(self.pack(start_state), 0, NO_VALUE, 0, NO_MOVE)
+        if self.isGoal(start_state):
+            return []
+
+        path = []
+        stack = [self.iterSuccessors(start_state)]
+        budget = self.budget
         
         while stack:
-            current, depth, path = stack.pop()
-            
-            if current in visited:
-                continue
-                
-            visited.add(current)
-            self.nodesExpanded += 1
-            
-            if self.isGoal(current):
-                return path
-            
-            if depth < depth_limit:
-                for next_state, move in reversed(self.successors(current)):
-                    if next_state not in visited:
-                        stack.append((next_state, depth + 1, path + [move]))
+            for next_state, move in stack[-1]:
+                if next_state in visited:
+                    continue
+
+                visited[next_state] = 0
+                self.nodesExpanded += 1
+                if budget is not None and not self.nodesExpanded & CHECK_MASK:
+                    budget.check(self.nodesExpanded, len(visited), self.stateBytes)
+                path.append(move)
+                if trace is not None:
+                    trace.record(self.pack(next_state), len(path), NO_VALUE, len(path), encodeMove(*move))
+
+                if self.isGoal(next_state):
+                    return path
+
+                if len(path) < depth_limit:
+                    stack.append(self.iterSuccessors(next_state))
+                else:
+                    path.pop()
+                break
+            else:
+                stack.pop()
+                if path:
+                    path.pop()
         
         return None
 
-    @staticmethod
-    def _reconstruct_path(parent, goal_state):
+    def _reconstruct_path(self, table, goal_state):
+        # Every search keeps only the code of the move into each state, so
+        # walk back by undoing that move to recover the predecessor. Any
+        # store with parentMove works: DictTable, StateTable, BucketQueue.
         path = []
         current = goal_state
+        code = table.parentMove(current)
         
-        while parent[current] is not None:
-            current, move = parent[current]
-            path.append(move)
+        while code != NO_MOVE:
+            vid, delta = decodeMove(code)
+            path.append((vid, delta))
+            current = self.move(current, vid, -delta)
+            code = table.parentMove(current)
         
         path.reverse()
         return path
 
+    @staticmethod
+    def _reconstruct_chain(node):
+        path = []
+        while node[1] is not None:
+            path.append(node[2])
+            node = node[1]
+        path.reverse()
+        return path
+
     def reconstruct(self, parent, state):
         return self._reconstruct_path(parent, state)
 
@@ -244,4 +682,4 @@ class Board:
         return self.successors(state)
 
     def heuristic(self, state):
-        return self.blocking_vehicles_heuristic(state)
+        return self.h(state)
@@ -0,0 +1,261 @@
+import argparse
+import csv
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from vehicle import Vehicle, Board
+from gameModels import Algorithm
+from levelPack import LevelPack, analyseLevel, goalDistances, initialState, levelFiles, loadLevelFile, writePack, NO_SOLUTION
+from solver import solve, algorithmByValue
+from budget import Budget, Exhausted
+
+try:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+except ImportError:
+    plt = None
+
+# Synthetic scaling workloads: families of random solvable layouts with a
+# chosen board size, vehicle count and optimal solution depth, and a driver
+# that runs every algorithm over a family to see where each stops scaling.
+
+
+def randomLayout(rng, size, vehicleCount, longShare=0.3, tries=1000):
+    # Target car at the left of the exit row, then vehicles dropped at
+    # random free spots. Horizontal vehicles never go in the exit row,
+    # since nothing could get them out of the target car's way.
+    redRow = (size - 1) // 2
+    vehicles = [Vehicle(0, redRow, 0, 2, True)]
+    occupied = {(redRow, 0), (redRow, 1)}
+    for _ in range(tries):
+        if len(vehicles) == vehicleCount:
+            break
+        length = 3 if rng.random() < longShare else 2
+        horizontal = rng.random() < 0.5
+        if horizontal:
+            row, col = rng.randrange(size), rng.randrange(size - length + 1)
+            if row == redRow:
+                continue
+            cells = {(row, col + k) for k in range(length)}
+        else:
+            row, col = rng.randrange(size - length + 1), rng.randrange(size)
+            cells = {(row + k, col) for k in range(length)}
+        if cells & occupied:
+            continue
+        occupied |= cells
+        vehicles.append(Vehicle(len(vehicles), row, col, length, horizontal))
+    return vehicles if len(vehicles) == vehicleCount else None
+
+
+def placedAt(vehicles, state):
+    return [Vehicle(vid, state[vid << 1], state[(vid << 1) + 1], v.length, v.isHorizontal)
+            for vid, v in enumerate(vehicles)]
+
+
+def generateLevel(rng, size, vehicleCount, minDepth, maxDepth, attempts=200):
+    # A random layout is solved backwards over its whole component, then
+    # the start is moved to a state whose optimal depth lies in
+    # [minDepth, maxDepth]. Returns the vehicles, or None after `attempts`
+    # layouts without such a state.
+    for _ in range(attempts):
+        vehicles = randomLayout(rng, size, vehicleCount)
+        if vehicles is None:
+            continue
+        board = Board(vehicles, size)
+        distances = goalDistances(board, initialState(vehicles))
+        candidates = [state for state, depth in distances.items() if minDepth <= depth <= maxDepth]
+        if candidates:
+            return placedAt(vehicles, rng.choice(sorted(candidates)))
+    return None
+
+
+def generateFamily(seed, size, vehicleCounts, depths, perConfig=1, attempts=200):
+    # One family: perConfig levels for every (vehicle count, depth range)
+    # pair. Returns (LevelInfo, vehicles) pairs ready for writePack.
+    rng = random.Random(seed)
+    levels = []
+    for vehicleCount in vehicleCounts:
+        for minDepth, maxDepth in depths:
+            for k in range(perConfig):
+                vehicles = generateLevel(rng, size, vehicleCount, minDepth, maxDepth, attempts)
+                name = f"s{size}-v{vehicleCount}-d{minDepth}-{maxDepth}-{k}"
+                if vehicles is None:
+                    print(f"{name}: no layout found in {attempts} attempts")
+                    continue
+                info = analyseLevel(name, vehicles, size)
+                print(f"{name}: {info.reachableStates} states, {info.optimalMoves} moves")
+                levels.append((info, vehicles))
+    return levels
+
+
+def writeLevelFiles(directory, levels):
+    # Level files have no board size, so only 6x6 families can use them.
+    os.makedirs(directory, exist_ok=True)
+    for info, vehicles in levels:
+        if info.size != 6:
+            raise ValueError(f"{info.name}: the level file format only holds 6x6 boards, write a pack instead")
+        with open(os.path.join(directory, f"{info.name}.txt"), "w") as file:
+            for v in vehicles:
+                file.write(f"{v.row} {v.col} {v.length} {'H' if v.isHorizontal else 'V'}\n")
+
+
+def loadWorkload(path):
+    # A pack, or a directory of level files, as (LevelInfo, vehicles) pairs.
+    if os.path.isdir(path):
+        levels = []
+        for filename in levelFiles(path):
+            vehicles = loadLevelFile(os.path.join(path, filename))
+            levels.append((analyseLevel(filename, vehicles), vehicles))
+        return levels
+    pack = LevelPack(path)
+    try:
+        return [(pack.info(i), pack.vehicles(i)) for i in range(len(pack))]
+    finally:
+        pack.close()
+
+
+def measure(info, vehicles, algorithm, workers=None, traceMemory=True, maxSeconds=None):
+    # One run for time and nodes, and a second under tracemalloc for the
+    # peak Python heap (it slows the search too much to time the same run).
+    # Worker processes of the parallel searches are not traced. A run that
+    # exhausts maxSeconds is recorded with its reason and not traced.
+    board = Board(vehicles, info.size)
+    start = initialState(vehicles)
+    startTime = time.perf_counter()
+    result = solve(board, start, algorithm, workers=workers, budget=Budget(seconds=maxSeconds))
+    elapsed = time.perf_counter() - startTime
+    exhausted = isinstance(result, Exhausted)
+    row = {
+        "level": info.name, "algorithm": algorithm.value, "states": info.reachableStates,
+        "optimal": info.optimalMoves if info.optimalMoves != NO_SOLUTION else "",
+        "moves": len(result[0]) if result is not None and not exhausted else "", "seconds": round(elapsed, 6),
+        "nodes": result.nodesExpanded if exhausted else board.nodesExpanded, "peakBytes": "",
+        "exhausted": result.reason if exhausted else "",
+    }
+    if traceMemory and not exhausted:
+        tracemalloc.start()
+        try:
+            solve(Board(vehicles, info.size), start, algorithm, workers=workers)
+            row["peakBytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return row
+
+
+def runWorkload(levels, algorithms, maxSeconds=10.0, workers=None, traceMemory=True):
+    # Levels run from the smallest state space up; an algorithm whose time
+    # budget of maxSeconds runs out on one level is dropped for the larger
+    # ones, and the size where that happened is reported as its limit.
+    levels = sorted(levels, key=lambda level: level[0].reachableStates)
+    rows = []
+    limits = {}
+    for info, vehicles in levels:
+        for algorithm in algorithms:
+            if algorithm in limits:
+                continue
+            row = measure(info, vehicles, algorithm, workers, traceMemory, maxSeconds)
+            rows.append(row)
+            print(f"{info.name} ({info.reachableStates} states) {algorithm.value}: "
+                  f"{row['seconds']:.3f}s, {row['nodes']} nodes, moves {row['moves'] or '-'}")
+            if row["exhausted"]:
+                limits[algorithm] = info.reachableStates
+    return rows, limits
+
+
+def writeCsv(path, rows):
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def plotRows(path, rows):
+    # Time, nodes and peak memory against reachable states, one line per
+    # algorithm, on log-log axes. Runs that ran out of budget are left out.
+    fig, axes = plt.subplots(1, 3, figsize=(16, 5))
+    metrics = [("seconds", "time (s)"), ("nodes", "nodes expanded"), ("peakBytes", "peak heap (bytes)")]
+    for algorithm in dict.fromkeys(row["algorithm"] for row in rows):
+        mine = [row for row in rows if row["algorithm"] == algorithm and not row["exhausted"]]
+        for ax, (key, label) in zip(axes, metrics):
+            points = [(row["states"], row[key]) for row in mine if row[key] not in ("", 0)]
+            if points:
+                ax.plot(*zip(*points), marker="o", label=algorithm)
+            ax.set_xscale("log")
+            ax.set_yscale("log")
+            ax.set_xlabel("reachable states")
+            ax.set_ylabel(label)
+    axes[0].legend(fontsize="small")
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def depthRange(value):
+    low, _, high = value.partition("-")
+    try:
+        return int(low), int(high or low)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a depth or a range like 10-15, got {value!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic Rush Hour workloads and measure how the solvers scale.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="write a family of random solvable levels")
+    generate.add_argument("output", help="a .pack file, or a directory for level files (6x6 only)")
+    generate.add_argument("--size", type=int, default=6, help="board size (default 6)")
+    generate.add_argument("--vehicles", type=int, nargs="+", default=[8, 10, 12],
+                          help="vehicle counts, target car included")
+    generate.add_argument("--depth", type=depthRange, nargs="+", default=[(5, 10), (15, 20), (25, 40)],
+                          help="optimal solution depths or ranges, e.g. 10 20-30")
+    generate.add_argument("--count", type=int, default=2, help="levels per vehicle count and depth")
+    generate.add_argument("--seed", type=int, default=0)
+    generate.add_argument("--attempts", type=int, default=200,
+                          help="random layouts tried per level before giving up")
+
+    run = commands.add_parser("run", help="time every algorithm over a workload")
+    run.add_argument("workload", help="a level pack or a directory of level files")
+    run.add_argument("-a", "--algorithm", type=algorithmByValue, action="append", default=None,
+                     help="algorithm to include (repeatable, default: all)")
+    run.add_argument("--max-seconds", type=float, default=10.0,
+                     help="time budget per run; an algorithm that runs out is dropped for larger levels")
+    run.add_argument("-w", "--workers", type=int, default=None, help="processes for the parallel searches")
+    run.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    run.add_argument("--csv", default="workload.csv", help="where to write the measurements")
+    run.add_argument("--plot", default="workload.png", help="where to write the plot (needs matplotlib)")
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        levels = generateFamily(args.seed, args.size, args.vehicles, args.depth, args.count, args.attempts)
+        if args.output.endswith(".pack"):
+            writePack(args.output, levels)
+        else:
+            writeLevelFiles(args.output, levels)
+        print(f"Wrote {len(levels)} levels to {args.output}")
+        return 0
+
+    algorithms = args.algorithm or list(Algorithm)
+    rows, limits = runWorkload(loadWorkload(args.workload), algorithms, args.max_seconds, args.workers,
+                               not args.no_memory)
+    if not rows:
+        print("The workload has no levels")
+        return 1
+    writeCsv(args.csv, rows)
+    print(f"Measurements written to {args.csv}")
+    for algorithm, states in limits.items():
+        print(f"{algorithm.value}: out of its {args.max_seconds:g}s budget at {states} reachable states")
+    if plt is None:
+        print("matplotlib is not installed, skipping the plot")
+    else:
+        plotRows(args.plot, rows)
+        print(f"Plot written to {args.plot}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())